@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# vim: set ff=unix fenc=utf-8 et ts=4 sts=4 sta sw=4:
+#
+# bench_compression.py
+# Compare throughput and output size of each compression codec.
+#
+# usage: python benchmarks/bench_compression.py [DIMENSION]
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from spiral_matrix.spiral_matrix import SpiralMatrix
+
+################################################################################
+def bench(m, codec, method):
+    '''
+    Render the matrix through one codec into a temporary file.
+
+    Return the elapsed seconds and the size of the file in bytes.
+    '''
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, 'out')
+        began = time.perf_counter()
+        method(m, filename, codec)
+        elapsed = time.perf_counter() - began
+        size = os.path.getsize(filename)
+
+    return elapsed, size
+
+def main():
+
+    dimension = int(sys.argv[1]) if len(sys.argv) > 1 else 501
+    words = os.path.join(os.path.dirname(__file__),
+            '..', 'test', 'test-input', 'lorem-ipsum.txt')
+
+    configs = [
+        ('integers', SpiralMatrix(dimension)),
+        ('tokens', SpiralMatrix(dimension, filename=words)),
+    ]
+    methods = [
+        ('show', lambda m, f, c: m.show(file=f, compress=c)),
+        ('csv', lambda m, f, c: m.export('csv', f, compress=c)),
+    ]
+
+    print(f'dimension: {dimension}')
+    print('%-9s %-5s %-6s %10s %12s %8s' %
+            ('series', 'out', 'codec', 'seconds', 'bytes', 'MB/s'))
+    for series, m in configs:
+        for name, method in methods:
+            raw_size = None
+            for codec in [None, 'gzip', 'xz', 'bz2']:
+                elapsed, size = bench(m, codec, method)
+                raw_size = raw_size or size
+                print('%-9s %-5s %-6s %10.3f %12d %8.1f' % (series, name,
+                        codec or 'none', elapsed, size,
+                        raw_size / elapsed / 1e6))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,306 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# vim: set ff=unix fenc=utf-8 et ts=4 sts=4 sta sw=4:
+#
+# backends.py
+# Storage strategies for the cells of a spiral matrix.
+#
+# Project home: <https://github.com/zero2cx/spiral-matrix>
+# Copyright (C) 2018 David Schenck
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from array import array
+from collections.abc import Sequence
+from sys import byteorder
+
+def id_typecode(count):
+    '''
+    Pick the narrowest unsigned array typecode able to index count tokens.
+
+    Return the typecode string.
+    '''
+
+    if count <= 1 << 8:
+        return 'B'
+
+    if count <= 1 << 16:
+        return 'H'
+
+    return 'L' if count > 1 << 32 else 'I'
+
+def array_typestr(typecode, itemsize):
+    '''
+    Describe an array typecode as an __array_interface__ typestr, e.g. '<i8'.
+
+    Return the typestr string.
+    '''
+
+    order = '|' if itemsize == 1 else '<' if byteorder == 'little' else '>'
+    kind = 'i' if typecode.islower() else 'u'
+
+    return f'{order}{kind}{itemsize}'
+
+def array_interface(view):
+    '''
+    Describe a shaped memoryview to numpy, as an __array_interface__.
+
+    The memoryview itself is handed over as the data, which keeps its
+    array alive for as long as numpy holds on to it.
+
+    Return the dict().
+    '''
+
+    return {
+        'version': 3,
+        'shape': view.shape,
+        'typestr': array_typestr(view.format, view.itemsize),
+        'data': view,
+    }
+
+def frozen_array(values):
+    '''
+    Copy an array into immutable bytes, seen through a read-only memoryview
+    of the same typecode, which indexes, slices and iterates like the array.
+
+    Return the memoryview.
+    '''
+
+    return memoryview(bytes(values)).cast(memoryview(values).format)
+
+def thawed_array(values):
+    '''
+    Copy a frozen_array() back into a mutable array, e.g. for pickling;
+    an array is passed through as it is.
+
+    Return the array.
+    '''
+
+    if isinstance(values, memoryview):
+        return array(values.format, values.tobytes())
+
+    return values
+
+################################################################################
+class CyclicSeries(Sequence):
+    '''
+    Repeat a cycle of token ids, without copying, until it reaches length
+    max, presenting each id as its token from the vocabulary list.
+    '''
+
+    def __init__(self, tokens, ids, max):
+
+        self.tokens = tokens
+        self.ids = ids
+        self.max = max
+
+    def __len__(self):
+
+        return self.max
+
+    def __getitem__(self, index):
+
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.max))]
+
+        if index < 0:
+            index += self.max
+
+        if not 0 <= index < self.max:
+            raise IndexError('series index out of range')
+
+        return self.tokens[self.ids[index % len(self.ids)]]
+
+################################################################################
+class ReadOnlyRow(list):
+    '''
+    Present one row of a non-list backend as a list that cannot be changed,
+    so that writing a cell raises TypeError rather than being lost.
+    '''
+
+    def _read_only(self, *args, **kwargs):
+
+        raise TypeError('read-only matrix row, see SpiralMatrix.backend')
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = clear = _read_only
+    sort = reverse = _read_only
+
+    def __reduce__(self):
+
+        return (type(self), (list(self),))
+
+################################################################################
+class MatrixView(Sequence):
+    '''
+    Present rows of a non-list backend as a read-only list-of-lists.
+
+    Subclasses provide _row(i), which returns row i as a new ReadOnlyRow.
+    '''
+
+    def __init__(self, dimension):
+
+        self.dimension = dimension
+
+    def __len__(self):
+
+        return self.dimension
+
+    def __getitem__(self, i):
+
+        if isinstance(i, slice):
+            return [self._row(j) for j in range(*i.indices(self.dimension))]
+
+        if i < 0:
+            i += self.dimension
+
+        if not 0 <= i < self.dimension:
+            raise IndexError('matrix row out of range')
+
+        return self._row(i)
+
+    def __eq__(self, other):
+
+        try:
+            return len(self) == len(other) and \
+                    all(row == list(other_row)
+                        for row, other_row in zip(self, other))
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self):
+
+        return f'{type(self).__name__}({self.dimension}x{self.dimension})'
+
+################################################################################
+class CompactMatrix(MatrixView):
+    '''
+    Hold the cells in one flat, row-major array.
+
+    Integer cells are the values themselves. Token cells are ids into the
+    vocabulary list, so each distinct token is stored only once.
+    '''
+
+    def __init__(self, values, dimension, vocabulary=None):
+
+        super().__init__(dimension)
+        self.values = values
+        self.vocabulary = vocabulary
+
+    def _row(self, i):
+
+        dimension = self.dimension
+        row = self.values[i * dimension:(i + 1) * dimension]
+
+        if self.vocabulary is None:
+            return ReadOnlyRow(row.tolist())
+
+        vocabulary = self.vocabulary
+        return ReadOnlyRow([vocabulary[id] for id in row])
+
+    def buffer(self):
+        '''
+        Share the values, without copying, as a read-only memoryview of
+        shape (dimension, dimension).
+        '''
+
+        dimension = self.dimension
+        view = memoryview(self.values).toreadonly()
+
+        return view.cast('B').cast(view.format, (dimension, dimension))
+
+    def __reduce__(self):
+
+        return (type(self), (thawed_array(self.values), self.dimension,
+                self.vocabulary))
+
+################################################################################
+class LazyMatrix(MatrixView):
+    '''
+    Hold no cells at all, generating each row from the spiral geometry.
+    '''
+
+    def __init__(self, spiral):
+
+        super().__init__(spiral.dimension)
+        self.spiral = spiral
+
+    def _row(self, i):
+
+        series = self.spiral.series
+
+        return ReadOnlyRow([series[index]
+                for index in self.spiral._row_indices(i)])
+
+################################################################################
+class BatchMatrix(Sequence):
+    '''
+    Hold count integer matrices of one dimension in one flat array of 64-bit
+    values, one row-major matrix after another.
+
+    Item k is matrix k, as a CompactMatrix; widths[k] is its cell-width.
+    '''
+
+    def __init__(self, values, dimension, count, widths):
+
+        self.values = values
+        self.dimension = dimension
+        self.count = count
+        self.widths = widths
+
+    def __len__(self):
+
+        return self.count
+
+    def __getitem__(self, k):
+
+        if k < 0:
+            k += self.count
+
+        if not 0 <= k < self.count:
+            raise IndexError('batch matrix out of range')
+
+        cells = self.dimension ** 2
+        return CompactMatrix(self.values[k * cells:(k + 1) * cells],
+                self.dimension)
+
+    def buffer(self):
+        '''
+        Share the values, without copying, as a read-only memoryview of
+        shape (count, dimension, dimension).
+        '''
+
+        dimension = self.dimension
+        view = memoryview(self.values).toreadonly()
+
+        return view.cast('B').cast(self.values.typecode,
+                (self.count, dimension, dimension))
+
+    def __buffer__(self, flags):
+
+        return self.buffer()
+
+    @property
+    def __array_interface__(self):
+
+        return array_interface(self.buffer())
+
+    def __repr__(self):
+
+        return f'{type(self).__name__}' \
+                f'({self.count}x{self.dimension}x{self.dimension})'
+
+################################################################################
+if __name__ == '__main__':
+    pass
@@ -71,6 +71,120 @@ class CommandLineInterface():
                 'outward from the center of the matrix. '
                 '(default: E)')
 
+        # arg: format
+        parser.add_argument(
+                '-F', '--format',
+                choices=['text', 'csv', 'tsv', 'jsonl', 'json'],
+                default='text',
+                help='This option selects the output format. The \'text\' '
+                'format prints the space-padded matrix. The \'csv\', '
+                '\'tsv\', \'jsonl\' (one JSON array per row), and '
+                '\'json\' (one array of rows) formats are written row by '
+                'row and ignore \'axes\'. (default: text)')
+
+        # arg: output
+        parser.add_argument(
+                '-o', '--output',
+                metavar='FILENAME',
+                default=None,
+                help='This option writes the output to the named file '
+                'instead of stdout. A filename ending in \'.gz\', '
+                '\'.xz\', or \'.bz2\' selects that compression. '
+                '(default: stdout)')
+
+        # arg: compress
+        parser.add_argument(
+                '-z', '--compress',
+                choices=['gzip', 'xz', 'bz2'],
+                default=None,
+                help='This option compresses the output row by row as it '
+                'is written, overriding any codec implied by the output '
+                'filename. (default: not used)')
+
+        # arg: resume
+        parser.add_argument(
+                '-R', '--resume',
+                action='store_true',
+                default=False,
+                help='This parameter-less option writes the uncompressed '
+                '\'output\' file with a checkpoint of the rows written so '
+                'far, kept beside it. If the write is interrupted, running '
+                'the same command again continues after the last '
+                'checkpoint. (default: False)')
+
+        # arg: jobs
+        parser.add_argument(
+                '-j', '--jobs',
+                type=self.arg_is_gt0_int,
+                default=None,
+                metavar='N',
+                help='This integer argument is the number of processes '
+                'that write the \'text\' format \'output\' file at '
+                'once, each placing its own rows. Rows are written in '
+                'order when a token is not ASCII. (default: not used)')
+
+        # arg: backend
+        parser.add_argument(
+                '-B', '--backend',
+                choices=['list', 'compact', 'lazy'],
+                default=None,
+                help='This option selects how the matrix cells are held: '
+                'as a list of lists, as one compact array, or not at all '
+                '(each row is generated when printed). (default: the '
+                'fastest that fits within \'budget\')')
+
+        # arg: budget
+        parser.add_argument(
+                '-m', '--budget',
+                type=self.arg_is_gt0_int,
+                default=None,
+                metavar='MIB',
+                help='This integer argument is the memory budget, in '
+                'MiB, used to choose the backend. (default: 512)')
+
+        # arg: dry-run
+        parser.add_argument(
+                '-n', '--dry-run',
+                action='store_true',
+                default=False,
+                help='This parameter-less option prints the chosen '
+                'backend along with the memory and time estimates of '
+                'each backend, without building the matrix. '
+                '(default: False)')
+
+        image_group = parser.add_argument_group(
+                'Image options',
+                'Alternatively, the matrix can be rendered as an image, with '
+                'one pixel per cell.')
+
+        # arg: image
+        image_group.add_argument(
+                '-i', '--image',
+                metavar='FILENAME',
+                default=None,
+                help='This option writes the matrix as an image to the '
+                'named file, instead of printing it. A filename ending in '
+                '\'.pgm\', \'.ppm\', or \'.pnm\' selects PGM/PPM; any '
+                'other selects PNG. A \'.pgm\' file takes the gray '
+                'colormap only. (default: not used)')
+
+        # arg: colormap
+        image_group.add_argument(
+                '-C', '--colormap',
+                choices=['gray', 'heat'],
+                default='gray',
+                help='This option selects how cell values, scaled from the '
+                'least to the greatest, are shaded. (default: gray)')
+
+        # arg: downsample
+        image_group.add_argument(
+                '-d', '--downsample',
+                type=self.arg_is_gt0_int,
+                default=1,
+                metavar='FACTOR',
+                help='This integer argument averages each block of FACTOR '
+                'by FACTOR cells into one pixel. (default: 1)')
+
         turn_group = parser.add_mutually_exclusive_group()
 
         # arg: right
@@ -114,6 +228,16 @@ class CommandLineInterface():
                 'cell\'s value as the spiral progresses from cell to '
                 'cell. (default: 1)')
 
+        # arg: primes
+        default_group.add_argument(
+                '-p', '--primes',
+                action='store_true',
+                default=False,
+                help='This parameter-less option prints an Ulam spiral: '
+                'each cell holding a prime number is marked with \'#\' '
+                '(or 1), and every other cell with \'.\' (or 0). The '
+                'matrix itself is never built. (default: False)')
+
         alternative_group = parser.add_argument_group(
                 'Token-filled matrix options',
                 'Alternatively, matrix cells can be populated with specified '
@@ -218,6 +342,24 @@ class CommandLineInterface():
 
         return arg
 
+    def arg_is_gt0_int(self, arg):
+        '''
+        Argument contraint: positive integer
+        '''
+        msg = f'"{arg}" should be a positive integer'
+
+        # test: is arg an integer?
+        try:
+            int(arg)
+        except:
+            raise argparse.ArgumentTypeError(msg)
+
+        # test: is arg greater than 0?
+        if int(arg) <= 0:
+            raise argparse.ArgumentTypeError(msg)
+
+        return int(arg)
+
     def arg_is_bearing(self, arg):
         '''
         Argument contraint: valid compass bearing as defined by self.caller
@@ -0,0 +1,420 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# vim: set ff=unix fenc=utf-8 et ts=4 sts=4 sta sw=4:
+#
+# exporters.py
+# Write the rows of a spiral matrix in machine-readable formats.
+#
+# Project home: <https://github.com/zero2cx/spiral-matrix>
+# Copyright (C) 2018 David Schenck
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import bz2
+import csv
+import gzip
+import io
+import json
+import lzma
+import os
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+# Size of the write buffer used for files opened by name.
+BUFFER_SIZE = 1 << 16
+
+# Rows written between checkpoints of a resumable write, and the suffix
+# added to the output filename to name its checkpoint sidecar.
+CHECKPOINT_ROWS = 1000
+CHECKPOINT_SUFFIX = '.checkpoint'
+
+# Most bytes of output laid out at a time by each write_parallel() process.
+BAND_SIZE = 1 << 24
+
+# Map each compression codec name to its standard-library opener.
+compressors = {
+    'gzip': gzip.open,
+    'xz': lzma.open,
+    'bz2': bz2.open,
+}
+
+# Map each recognized filename extension to its compression codec name.
+extensions = {
+    '.gz': 'gzip',
+    '.xz': 'xz',
+    '.bz2': 'bz2',
+}
+
+def codec_for(filename):
+    '''
+    Determine the compression codec implied by a filename extension.
+
+    Return the codec name, or None for an uncompressed file.
+    '''
+
+    return extensions.get(os.path.splitext(str(filename))[1].lower())
+
+@contextmanager
+def open_output(file=None, compress=None):
+    '''
+    Provide a buffered, writable text stream.
+
+    A filename is opened (and closed afterwards) with a large write buffer.
+    An already-open stream is used as-is. None selects stdout.
+
+    When compress names a codec, or a filename ends in a recognized
+    extension, the text is compressed incrementally as it is written, so
+    no uncompressed copy of the output is ever held or stored.
+    '''
+
+    if compress is None and isinstance(file, (str, os.PathLike)):
+        compress = codec_for(file)
+
+    if compress is not None:
+        try:
+            opener = compressors[compress]
+        except KeyError:
+            raise AttributeError(f'not a compression codec: "{compress}"')
+
+    if file is None:
+        if compress is None:
+            yield sys.stdout
+            sys.stdout.flush()
+            return
+        file = sys.stdout.buffer
+
+    if hasattr(file, 'write'):
+        if compress is None:
+            yield file
+            return
+        if isinstance(file, io.TextIOBase):
+            file = file.buffer
+
+    if compress is None:
+        with open(file, 'w', buffering=BUFFER_SIZE, newline='') as stream:
+            yield stream
+        return
+
+    # The compressed file objects own a raw writer; buffer the text side so
+    # the codec sees large chunks rather than one call per cell.
+    with opener(file, 'wb') as raw:
+        buffered = io.BufferedWriter(raw, buffer_size=BUFFER_SIZE)
+        stream = io.TextIOWrapper(buffered, encoding='utf-8', newline='')
+        try:
+            yield stream
+        finally:
+            # Flush and release the wrappers without closing the codec twice.
+            stream.detach().detach()
+
+def text_layout(dimension, width, axes=False):
+    '''
+    Lay out each row as one line of space-padded cells of the given width.
+
+    Column- and row-labels are prefixed along the top and left, if needed.
+
+    Return a tuple of (header, line, footer), where line(i, row) returns
+    the text of row i.
+    '''
+
+    header = ''
+    if axes:
+        header = '    ' + ''.join(
+                '%*s ' % (width, n) for n in range(dimension)) + '\n'
+
+    def line(i, row):
+        text = ''.join('%*s ' % (width, cell) for cell in row)
+        if axes:
+            text = '%2s  ' % (i) + text
+        return text + '\n'
+
+    return header, line, ''
+
+def text_line_size(i, dimension, width, axes=False):
+    '''
+    Count the bytes in line i of text_layout(), when every cell is ASCII.
+
+    Return the size integer.
+    '''
+
+    size = dimension * (width + 1) + 1
+    if axes:
+        size += len('%2s  ' % (i))
+
+    return size
+
+def csv_layout(dimension, delimiter=','):
+    '''
+    Lay out each row as one line of comma-separated values.
+    '''
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=delimiter, lineterminator='\n')
+
+    def line(i, row):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(row)
+        return buffer.getvalue()
+
+    return '', line, ''
+
+def tsv_layout(dimension):
+    '''
+    Lay out each row as one line of tab-separated values.
+    '''
+
+    return csv_layout(dimension, delimiter='\t')
+
+def jsonl_layout(dimension):
+    '''
+    Lay out each row as one JSON array per line.
+    '''
+
+    return '', lambda i, row: json.dumps(row) + '\n', ''
+
+def json_layout(dimension):
+    '''
+    Lay out all rows as a single JSON array of arrays, one row per line.
+    '''
+
+    def line(i, row):
+        return ('[' if i == 0 else ',\n ') + json.dumps(row)
+
+    return '', line, ']\n'
+
+# Map each export format name to its row layout.
+exporters = {
+    'csv': csv_layout,
+    'tsv': tsv_layout,
+    'jsonl': jsonl_layout,
+    'json': json_layout,
+}
+
+def write_rows(rows, stream, layout):
+    '''
+    Write the header, each row, then the footer of a layout to a stream.
+    '''
+
+    header, line, footer = layout
+    stream.write(header)
+    for i, row in enumerate(rows):
+        stream.write(line(i, row))
+    stream.write(footer)
+
+def write_flags(flags, stream, axes=False, glyphs='.#'):
+    '''
+    Write a CompactMatrix of 0/1 flags as text_layout() would, with a width
+    of one, showing each flag as its glyph.
+
+    Each line is assembled by translating the flag bytes, not cell by cell.
+    '''
+
+    dimension = flags.dimension
+    table = bytearray(256)
+    table[0], table[1] = glyphs.encode('ascii')
+
+    if axes:
+        stream.write('    ' + ''.join(
+                '%1s ' % (n) for n in range(dimension)) + '\n')
+
+    line = bytearray(b' ') * (2 * dimension)
+    for i in range(dimension):
+        row = flags.values[i * dimension:(i + 1) * dimension]
+        line[0::2] = row.tobytes().translate(table)
+        if axes:
+            stream.write('%2s  ' % (i))
+        stream.write(line.decode('ascii') + '\n')
+
+def read_checkpoint(filename, job):
+    '''
+    Check the partial output recorded by the checkpoint sidecar of a file.
+
+    The sidecar must belong to the same job, and the first offset bytes of
+    the file must still match the recorded checksum.
+
+    Return the recorded dict() of 'row', 'offset' and 'checksum', or None
+    when there is nothing valid to resume from.
+    '''
+
+    try:
+        with open(filename + CHECKPOINT_SUFFIX) as file:
+            state = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(state, dict) or state.get('job') != job:
+        return None
+
+    checksum, remaining = 0, state['offset']
+    try:
+        with open(filename, 'rb') as file:
+            while remaining:
+                data = file.read(min(BUFFER_SIZE, remaining))
+                if not data:
+                    return None
+                checksum = zlib.crc32(data, checksum)
+                remaining -= len(data)
+    except OSError:
+        return None
+
+    return state if checksum == state['checksum'] else None
+
+def write_checkpoint(filename, job, row, offset, checksum):
+    '''
+    Record the rows written so far in the checkpoint sidecar of a file.
+
+    The sidecar is replaced in one step, so it is never seen half-written.
+    '''
+
+    sidecar = filename + CHECKPOINT_SUFFIX
+    with open(sidecar + '.tmp', 'w') as file:
+        json.dump({ 'job': job, 'row': row, 'offset': offset,
+                'checksum': checksum }, file)
+    os.replace(sidecar + '.tmp', sidecar)
+
+def write_resumable(rows, filename, layout, job, every=None):
+    '''
+    Write a layout to a file by name, recording a checkpoint every so many
+    rows, and pick up after the last checkpoint left by an earlier attempt.
+
+    rows(first) generates the rows from row first onwards, so the rows
+    already on disk are never generated again. The job is a string naming
+    what is being written; a checkpoint left by a different job, or whose
+    partial output no longer matches its checksum, is ignored and the file
+    is written from the start. The sidecar is removed once the file is
+    complete.
+
+    Return the row the write started from.
+    '''
+
+    if every is None:
+        every = CHECKPOINT_ROWS
+
+    header, line, footer = layout
+    state = read_checkpoint(filename, job)
+    first, offset, checksum = (state['row'], state['offset'],
+            state['checksum']) if state else (0, 0, 0)
+
+    with open(filename, 'r+b' if state else 'wb',
+            buffering=BUFFER_SIZE) as stream:
+        stream.seek(offset)
+        stream.truncate()
+
+        def put(text):
+            nonlocal offset, checksum
+            data = text.encode('utf-8')
+            stream.write(data)
+            offset += len(data)
+            checksum = zlib.crc32(data, checksum)
+
+        if not first:
+            put(header)
+        for i, row in enumerate(rows(first), first):
+            put(line(i, row))
+
+            # Only rows known to be on disk are recorded as written.
+            if (i + 1) % every == 0:
+                stream.flush()
+                os.fsync(stream.fileno())
+                write_checkpoint(filename, job, i + 1, offset, checksum)
+        put(footer)
+
+    try:
+        os.remove(filename + CHECKPOINT_SUFFIX)
+    except FileNotFoundError:
+        pass
+
+    return first
+
+# State of each write_parallel() process, set once as the process starts.
+band_worker = {}
+
+def start_band_worker(row, filename, layout, arguments):
+    '''
+    Set up one write_parallel() process to lay out rows and write them.
+    '''
+
+    band_worker['row'] = row
+    band_worker['line'] = layout(*arguments)[1]
+    band_worker['fd'] = os.open(filename, os.O_WRONLY)
+
+def write_band(first, last, offset, size):
+    '''
+    Lay out rows first up to last, and write them at offset in the file.
+
+    Raise exception, if the rows do not come to size bytes, as a smaller
+    or larger band would spill into the bands on either side.
+    '''
+
+    row, line = band_worker['row'], band_worker['line']
+    data = ''.join(line(i, row(i)) for i in range(first, last)).encode('utf-8')
+    if len(data) != size:
+        raise ValueError(f'rows {first} to {last - 1} are not {size} bytes')
+
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(band_worker['fd'], view, offset)
+        view, offset = view[written:], offset + written
+
+def write_parallel(row, filename, layout, size, arguments, jobs):
+    '''
+    Write a layout to a file by name, with bands of rows laid out by a pool
+    of jobs processes, each band written straight to its own offset with
+    os.pwrite(). The file is sized in full before any band is written, so
+    there is nothing to put back together afterwards.
+
+    The layout is called with arguments, the first of which is the row
+    count. row(i) returns row i, and size(i, *arguments) returns the byte
+    size of its line; as every offset is known up front, the lines must
+    come to exactly that size. The row and layout functions are sent to
+    each process, so they must pickle.
+    '''
+
+    header, line, footer = layout(*arguments)
+    header, footer = header.encode('utf-8'), footer.encode('utf-8')
+    count = arguments[0]
+
+    # Split the rows into bands of at most BAND_SIZE bytes, and at least
+    # a few bands per process, so that no process is left idle for long.
+    most = max(1, -(-count // (4 * jobs)))
+    bands, offset, first = [], len(header), 0
+    while first < count:
+        start, last = offset, first
+        while last < count and last - first < most:
+            line_size = size(last, *arguments)
+            if last > first and offset - start + line_size > BAND_SIZE:
+                break
+            offset += line_size
+            last += 1
+        bands.append((first, last, start, offset - start))
+        first = last
+
+    with open(filename, 'wb') as stream:
+        stream.write(header)
+        stream.truncate(offset + len(footer))
+
+    with ProcessPoolExecutor(jobs, initializer=start_band_worker,
+            initargs=(row, filename, layout, arguments)) as pool:
+        for future in [pool.submit(write_band, *band) for band in bands]:
+            future.result()
+
+    with open(filename, 'r+b') as stream:
+        stream.seek(offset)
+        stream.write(footer)
+
+################################################################################
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# vim: set ff=unix fenc=utf-8 et ts=4 sts=4 sta sw=4:
+#
+# image.py
+# Write images one scanline at a time, as PGM/PPM or PNG.
+#
+# Project home: <https://github.com/zero2cx/spiral-matrix>
+# Copyright (C) 2018 David Schenck
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import struct
+import zlib
+
+# Size of the write buffer, and of the compressed data held per PNG chunk.
+BUFFER_SIZE = 1 << 16
+
+def gray(level):
+    '''
+    Map a level from 0.0 to 1.0 onto black through white.
+    '''
+
+    return round(level * 255)
+
+def heat(level):
+    '''
+    Map a level from 0.0 to 1.0 onto black, red, yellow, then white.
+    '''
+
+    return (round(min(1.0, level * 3) * 255),
+            round(min(1.0, max(0.0, level * 3 - 1)) * 255),
+            round(min(1.0, max(0.0, level * 3 - 2)) * 255))
+
+# Map each colormap name to its level-to-colour function.
+colormaps = {
+    'gray': gray,
+    'heat': heat,
+}
+
+# Map each recognized filename extension to its image format.
+extensions = {
+    '.pgm': 'pnm',
+    '.ppm': 'pnm',
+    '.pnm': 'pnm',
+    '.png': 'png',
+}
+
+# Map each PNM filename extension that fixes the channel count to that count.
+channels = {
+    '.pgm': 1,
+    '.ppm': 3,
+}
+
+def palette(colormap):
+    '''
+    Sample a colormap at each of 256 levels, once, into translation tables.
+
+    The colormap is a name from colormaps, or a function of a level from
+    0.0 to 1.0 that returns a gray value or an (r, g, b) tuple of 0-255.
+
+    Return a tuple of one table (gray) or three tables (r, g, b), each a
+    bytes() of 256 entries for use with bytes.translate().
+    '''
+
+    if not callable(colormap):
+        try:
+            colormap = colormaps[colormap]
+        except KeyError:
+            raise AttributeError(f'not a colormap: "{colormap}"')
+
+    colours = [colormap(level / 255) for level in range(256)]
+    if isinstance(colours[0], int):
+        return (bytes(colours),)
+
+    return tuple(bytes(colour[c] for colour in colours) for c in range(3))
+
+def scanline(levels, tables):
+    '''
+    Translate a bytes() of 0-255 levels into one row of pixel bytes.
+
+    Return the bytes of the row, with the channels interleaved.
+    '''
+
+    if len(tables) == 1:
+        return levels.translate(tables[0])
+
+    line = bytearray(3 * len(levels))
+    for c, table in enumerate(tables):
+        line[c::3] = levels.translate(table)
+
+    return bytes(line)
+
+def downsample(rows, width, factor):
+    '''
+    Average each factor x factor block of levels into one level.
+
+    Only one output row of sums is held at a time.
+
+    Yield each row of averaged levels, as a bytes().
+    '''
+
+    if factor == 1:
+        yield from (bytes(row) for row in rows)
+        return
+
+    columns = (width + factor - 1) // factor
+    sizes = [min(factor, width - j * factor) for j in range(columns)]
+    sums, count = [0] * columns, 0
+    for row in rows:
+        for j in range(columns):
+            sums[j] += sum(row[j * factor:(j + 1) * factor])
+        count += 1
+        if count == factor:
+            yield bytes(total // (size * count)
+                    for total, size in zip(sums, sizes))
+            sums, count = [0] * columns, 0
+
+    if count:
+        yield bytes(total // (size * count) for total, size in zip(sums, sizes))
+
+def write_pnm(lines, width, height, channels, stream):
+    '''
+    Write binary PGM (one channel) or PPM (three channels) image data.
+    '''
+
+    stream.write(b'P5' if channels == 1 else b'P6')
+    stream.write(b'\n%d %d\n255\n' % (width, height))
+    for line in lines:
+        stream.write(line)
+
+def png_chunk(stream, kind, data):
+    '''
+    Write one PNG chunk: length, type, data, then the CRC of type and data.
+    '''
+
+    stream.write(struct.pack('>I', len(data)))
+    stream.write(kind)
+    stream.write(data)
+    stream.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(kind))))
+
+def write_png(lines, width, height, channels, stream):
+    '''
+    Write 8-bit gray or RGB PNG image data.
+
+    Each scanline is compressed as it arrives, and the compressed data is
+    written out in IDAT chunks of about BUFFER_SIZE bytes.
+    '''
+
+    stream.write(b'\x89PNG\r\n\x1a\n')
+    png_chunk(stream, b'IHDR', struct.pack('>IIBBBBB', width, height, 8,
+            0 if channels == 1 else 2, 0, 0, 0))
+
+    compressor = zlib.compressobj()
+    pending = bytearray()
+    for line in lines:
+        pending += compressor.compress(b'\x00' + line)
+        if len(pending) >= BUFFER_SIZE:
+            png_chunk(stream, b'IDAT', bytes(pending))
+            pending = bytearray()
+    pending += compressor.flush()
+    png_chunk(stream, b'IDAT', bytes(pending))
+    png_chunk(stream, b'IEND', b'')
+
+# Map each image format to its writer.
+writers = {
+    'pnm': write_pnm,
+    'png': write_png,
+}
+
+def write_image(rows, width, file, format=None, colormap='gray', factor=1):
+    '''
+    Write rows of 0-255 levels as an image, one scanline at a time.
+
+    The format is 'pnm' or 'png', or is implied by the filename extension.
+    The file is a filename or a writable binary stream. A '.pgm' filename
+    takes a gray colormap only; a '.ppm' filename writes gray as RGB.
+    '''
+
+    extension = os.path.splitext(str(file))[1].lower()
+    if format is None:
+        format = extensions.get(extension, 'png')
+
+    try:
+        writer = writers[format]
+    except KeyError:
+        raise AttributeError(f'not an image format: "{format}"')
+
+    tables = palette(colormap)
+    if format == 'pnm' and not hasattr(file, 'write'):
+        want = channels.get(extension, len(tables))
+        if want < len(tables):
+            raise AttributeError(
+                f'not a gray colormap for a PGM file: "{colormap}"')
+        tables *= want // len(tables)
+    size = (width + factor - 1) // factor
+    lines = (scanline(levels, tables)
+            for levels in downsample(rows, width, factor))
+
+    if hasattr(file, 'write'):
+        writer(lines, size, size, len(tables), file)
+        return
+
+    with open(file, 'wb', buffering=BUFFER_SIZE) as stream:
+        writer(lines, size, size, len(tables), stream)
+
+################################################################################
+if __name__ == '__main__':
+    pass
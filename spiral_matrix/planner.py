@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# vim: set ff=unix fenc=utf-8 et ts=4 sts=4 sta sw=4:
+#
+# planner.py
+# Estimate the memory and time cost of each backend, and pick one.
+#
+# Project home: <https://github.com/zero2cx/spiral-matrix>
+# Copyright (C) 2018 David Schenck
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from array import array
+from sys import getsizeof
+from backends import id_typecode
+
+# Memory budget used when the caller does not give one, in bytes.
+DEFAULT_BUDGET = 512 * 2 ** 20
+
+# Largest and smallest integers that fit a compact 64-bit cell.
+INT64_MAX = 2 ** 63 - 1
+INT64_MIN = -2 ** 63
+
+# Backends in order of preference, on equal estimated time. The list
+# backend is the mutable list-of-lists and is the cheapest to read cells
+# back from; the compact backend is the cheapest in memory that still
+# holds every cell; the lazy backend holds nothing but is the costliest
+# to read.
+backends = ('list', 'compact', 'lazy')
+
+# Approximate cost of each backend per cell: bytes held, seconds to build,
+# and seconds to read back once. Integer cells of the list backend are
+# boxed int objects; its token cells are pointers to the shared tokens.
+costs = {
+    'list': {
+        'integers': { 'bytes': 8 + 32, 'build': 2.5e-6, 'read': 0.001e-6 },
+        'tokens':   { 'bytes': 8,      'build': 3.0e-6, 'read': 0.001e-6 },
+    },
+    'compact': {
+        'integers': { 'bytes': 8, 'build': 0.12e-6, 'read': 0.02e-6 },
+        'tokens':   { 'bytes': 1, 'build': 0.11e-6, 'read': 0.04e-6 },
+    },
+    'lazy': {
+        'integers': { 'bytes': 0, 'build': 0.0, 'read': 0.2e-6 },
+        'tokens':   { 'bytes': 0, 'build': 0.0, 'read': 0.5e-6 },
+    },
+}
+
+def estimate(backend, dimension, tokens=None, period=None):
+    '''
+    Estimate the cost of one backend for a matrix of this size and series.
+
+    The tokens are the distinct vocabulary, and period is the length of
+    the cycle of token ids (default: one id per token).
+
+    Return a dict() of 'memory' (bytes), 'build' and 'read' (seconds).
+    '''
+
+    kind = 'integers' if tokens is None else 'tokens'
+    cost = costs[backend][kind]
+    cells = dimension ** 2
+
+    # Every backend holds the distinct tokens and the cycle of their ids,
+    # and at least one row list.
+    memory = 56 + 8 * dimension + 32 * dimension
+    if tokens is not None:
+        memory += sum(getsizeof(token) for token in tokens) + 8 * len(tokens)
+        memory += (len(tokens) if period is None else period) * \
+                array(id_typecode(len(tokens))).itemsize
+
+    per_cell = cost['bytes']
+    if backend == 'compact' and tokens is not None:
+        per_cell = array(id_typecode(len(tokens))).itemsize
+    if backend == 'list':
+        memory += dimension * (56 + 8)
+
+    return {
+        'memory': memory + per_cell * cells,
+        'build': cost['build'] * cells,
+        'read': cost['read'] * cells,
+    }
+
+def plan(dimension, tokens=None, start=1, step=1, budget=None, period=None):
+    '''
+    Estimate each backend, and pick the one that fits the budget with the
+    least estimated time to build and read back once.
+
+    The compact backend is ruled out for integers beyond 64 bits. When no
+    backend fits, the lazy backend is picked, since it holds only one row.
+
+    Return a dict() of 'backend', 'budget', and per-backend 'estimates'.
+    '''
+
+    if budget is None:
+        budget = DEFAULT_BUDGET
+
+    last = start + (dimension ** 2 - 1) * step
+    wide = tokens is None and \
+            not INT64_MIN <= min(start, last) <= max(start, last) <= INT64_MAX
+
+    estimates = {}
+    for backend in backends:
+        estimates[backend] = estimate(backend, dimension, tokens, period)
+        estimates[backend]['fits'] = \
+                estimates[backend]['memory'] <= budget and \
+                not (backend == 'compact' and wide)
+
+    fitting = [backend for backend in backends
+            if estimates[backend]['fits']]
+    choice = min(fitting, default='lazy', key=lambda backend:
+            estimates[backend]['build'] + estimates[backend]['read'])
+
+    return {
+        'backend': choice,
+        'budget': budget,
+        'dimension': dimension,
+        'series': 'integers' if tokens is None else 'tokens',
+        'estimates': estimates,
+    }
+
+def describe(plan):
+    '''
+    Format a plan as a human-readable table.
+
+    Return the text.
+    '''
+
+    lines = [
+        f'dimension: {plan["dimension"]}  cells: {plan["dimension"] ** 2}  '
+        f'series: {plan["series"]}',
+        f'budget:    {plan["budget"] / 2 ** 20:.1f} MiB',
+        f'backend:   {plan["backend"]}',
+        '',
+        '%-9s %12s %10s %10s  %s' %
+                ('backend', 'memory MiB', 'build s', 'read s', 'fits'),
+    ]
+    for backend, estimate in plan['estimates'].items():
+        lines.append('%-9s %12.1f %10.3f %10.3f  %s' % (backend,
+                estimate['memory'] / 2 ** 20, estimate['build'],
+                estimate['read'], 'yes' if estimate['fits'] else 'no'))
+
+    return '\n'.join(lines)
+
+################################################################################
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# vim: set ff=unix fenc=utf-8 et ts=4 sts=4 sta sw=4:
+#
+# sieve.py
+# Find the primes of an arithmetic series with a segmented sieve.
+#
+# Project home: <https://github.com/zero2cx/spiral-matrix>
+# Copyright (C) 2018 David Schenck
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from itertools import compress
+from math import isqrt
+
+# Count of series elements sieved at a time; this bounds the memory used.
+SEGMENT_SIZE = 1 << 20
+
+def small_primes(limit):
+    '''
+    Sieve the primes up to and including limit.
+
+    Return the list of primes.
+    '''
+
+    if limit < 2:
+        return []
+
+    flags = bytearray([1]) * (limit + 1)
+    flags[0] = flags[1] = 0
+    for p in range(2, isqrt(limit) + 1):
+        if flags[p]:
+            flags[p * p::p] = bytes(len(range(p * p, limit + 1, p)))
+
+    return [p for p in range(limit + 1) if flags[p]]
+
+def base_primes(limit, segment=SEGMENT_SIZE):
+    '''
+    Sieve the primes up to and including limit, a segment at a time.
+
+    Only the segment and the primes up to the square root of limit are
+    held in memory, so the primes below the square root of a large value
+    can be produced without a bytearray or list of that size.
+
+    Yield each prime, in order.
+    '''
+
+    roots = small_primes(isqrt(limit))
+    yield from roots
+
+    for begin in range(isqrt(limit) + 1, limit + 1, segment):
+        end = min(begin + segment, limit + 1)
+        flags = bytearray([1]) * (end - begin)
+        for p in roots:
+            at = -begin % p
+            flags[at::p] = bytes(len(range(at, end - begin, p)))
+        yield from compress(range(begin, end), flags)
+
+def prime_flags(start, step, count, segment=SEGMENT_SIZE):
+    '''
+    Sieve the series start, start + step, ... of count elements for primes.
+
+    The sieve runs over series positions rather than over values, so a
+    step other than 1 costs no more than a step of 1. Element i is a
+    multiple of prime p exactly when i falls in one residue class mod p
+    (or, when p divides step, in none or all of them). Negative elements,
+    0 and 1 are not prime.
+
+    The primes dividing out the composites are themselves sieved a segment
+    at a time, per segment of the series, so memory is bounded by the
+    segment size rather than by the magnitude of the elements.
+
+    Yield a bytearray of flags (1 for prime) for each segment, in order.
+    '''
+
+    if step == 0:
+        raise AttributeError(f'not a non-zero integer: "{step}"')
+
+    # Positions of the elements that are at least 2 form one contiguous run.
+    if step > 0:
+        low, high = max(0, -((start - 2) // step)), count
+    else:
+        low, high = 0, min(count, (start - 2) // -step + 1)
+
+    for begin in range(0, count, segment):
+        end = min(begin + segment, count)
+        flags = bytearray([1]) * (end - begin)
+        top = max(start + begin * step, start + (end - 1) * step, 0)
+
+        # Clear everything outside the run of elements of 2 or more.
+        if low > begin:
+            flags[:min(low, end) - begin] = bytes(min(low, end) - begin)
+        if high < end:
+            at = max(high, begin) - begin
+            flags[at:] = bytes(end - begin - at)
+
+        for p in base_primes(isqrt(top), segment):
+
+            # Position of the first multiple of p, unless there is none.
+            if step % p:
+                first, stride = -start * pow(step, -1, p) % p, p
+            elif start % p == 0:
+                first, stride = 0, 1
+            else:
+                continue
+            at = (first - begin) % stride
+            flags[at::stride] = bytes(len(range(at, end - begin, stride)))
+
+            # The prime itself is not a multiple of a smaller prime.
+            i, remainder = divmod(p - start, step)
+            if not remainder and begin <= i < end:
+                flags[i - begin] = 1
+
+        yield flags
+
+################################################################################
+if __name__ == '__main__':
+    pass
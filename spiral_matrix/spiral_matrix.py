@@ -73,7 +73,8 @@ class SpiralMatrix():
     }
 
     def __init__(self, dimension=None, bearing='E', turn=False,
-            start=1, step=1, filename=None, words=None, testing=False):
+            start=1, step=1, filename=None, words=None, testing=False,
+            backend=None, budget=None, dry_run=False, tokens=None):
         '''
         Generate a new instance of SpiralMatrix.
 
@@ -87,24 +88,251 @@ class SpiralMatrix():
             step      : int : incrementing step value of the numeric progression
             file      : file : named file containing space-delimited word tokens
             words     : str : string of space-delimited word tokens
-            series    : list : list of elements with which to populate the cells
+            tokens    : list : distinct word tokens, the vocabulary
+            token_ids : array : cycle of ids into tokens, one per token taken
+            series    : range/CyclicSeries : elements populating the cells
             width     : int : width of each matrix cell, in character-count
             test      : bool : only used when instantiated via test case
+            plan      : dict : backend estimates, see planner.plan()
+            backend   : list/compact/lazy : storage strategy of the matrix
+            budget    : int : memory budget of the planner, in bytes
+            dry_run   : bool : plan the backend, but build nothing
+            pickle_matrix : bool : pickle the built cells, not just parameters
         '''
 
+        from planner import plan
+
         # Assign attributes from arguments.
         self.dimension = self._dimension(dimension)
         self.origin = (self.dimension // 2, self.dimension // 2)
         self.max = self.dimension ** 2
         self.bearing = self._bearing(bearing)
         self.turn = 'right' if turn else 'left'
-        self.series = self._series(
-                filename, words, self._start(start), self._step(step))
-        self.width = self._width(self.series)
+        self.start = self._start(start)
+        self.step = self._step(step)
+        self.tokens, self.token_ids = self._tokens(filename, words, tokens)
+
+        # Pick the storage strategy that fits within the memory budget.
+        self.plan = plan(self.dimension, self.tokens, self.start, self.step,
+                budget, self.token_ids and len(self.token_ids))
+        self.backend = self._backend(backend)
+        self.series = self._series(self.tokens, self.start, self.step)
+        self._cell_width = None
+        self._positions = None
+        self._token_index = None
+        self.pickle_matrix = False
 
         # Build the matrix structure that conforms to the attributes.
-        if not testing:
-            self._build()
+        if not testing and not dry_run:
+            self.builders[self.backend](self)
+
+    def __reduce__(self):
+        '''
+        Pickle the construction parameters, rather than the built cells.
+
+        The receiving side rebuilds the matrix, if one was built, with the
+        same backend. When pickle_matrix is set, the built cells are sent
+        along instead and the rebuild is skipped, which pays off when
+        building costs more than transferring. A lazy matrix is always
+        rebuilt, as it holds no cells.
+
+        Return the 3-tuple of (callable, arguments, state).
+        '''
+
+        from functools import partial
+
+        built = hasattr(self, 'matrix')
+        ship = self.pickle_matrix and built and self.backend != 'lazy'
+        function = partial(type(self), **self._parameters(ship or not built))
+
+        state = None
+        if self.pickle_matrix or self.frozen:
+            state = { 'pickle_matrix': self.pickle_matrix }
+        if ship:
+            state.update(matrix=self.matrix, _cell_width=self._cell_width)
+        if self.frozen:
+            state.update(_frozen=True)
+
+        return (function, (), state)
+
+    def _parameters(self, testing=False):
+        '''
+        Collect the construction parameters of this spiral, by name, so that
+        a copy does not depend on the order of the __init__() arguments.
+
+        The tokens travel as the vocabulary and one cycle of ids. With
+        testing, the copy is made without building its matrix.
+
+        Return the dict() of keyword arguments to SpiralMatrix().
+        '''
+
+        from backends import CyclicSeries, thawed_array
+
+        bearing = next(key for key, value in self.compass.items()
+                if value == self.bearing)
+
+        tokens = None
+        if self.tokens is not None:
+            tokens = CyclicSeries(self.tokens,
+                    thawed_array(self.token_ids), len(self.token_ids))
+
+        return {
+            'dimension': self.dimension,
+            'bearing': bearing,
+            'turn': self.turn == 'right',
+            'start': self.start,
+            'step': self.step,
+            'testing': testing,
+            'backend': self.backend,
+            'budget': self.plan['budget'],
+            'tokens': tokens,
+        }
+
+    def __setstate__(self, state):
+        '''
+        Restore the pickled state, freezing again if the original was.
+        '''
+
+        frozen = state.pop('_frozen', False)
+        self.__dict__.update(state)
+        if frozen:
+            self.freeze()
+
+    # Lazily computed caches, which may still be filled in once frozen.
+    caches = ('_cell_width', '_positions', '_token_index')
+
+    def __setattr__(self, name, value):
+        '''
+        Raise exception, if this instance is frozen, see freeze().
+        '''
+
+        if self.frozen and name not in self.caches:
+            raise AttributeError(f'frozen instance, not setting: "{name}"')
+
+        super().__setattr__(name, value)
+
+    @property
+    def frozen(self):
+        '''
+        True once freeze() has been called.
+        '''
+
+        return self.__dict__.get('_frozen', False)
+
+    def freeze(self):
+        '''
+        Make this instance read-only, so that it is safe to share between
+        threads, and so that buffer() shares the built cells.
+
+        A built list matrix is replaced by a compact matrix of the same
+        cells, as they stand, edits included. The cell values and token ids
+        are copied into immutable bytes, and the tokens into a tuple; the
+        lazy caches are filled in first, and no attribute can be set
+        afterwards.
+
+        Raise exception, if a cell of a list matrix cannot be encoded, see
+        _list_values().
+        Return this instance.
+        '''
+
+        from backends import CompactMatrix, CyclicSeries, frozen_array
+
+        if self.frozen:
+            return self
+
+        # Encode the cells first, so that nothing is changed on failure.
+        values = None
+        if hasattr(self, 'matrix') and self.backend in ('list', 'compact'):
+            values = self._list_values() if self.backend == 'list' \
+                    else self.matrix.values
+
+        # The token list, the ids and the cell values become immutable.
+        if self.tokens is not None:
+            self.tokens = tuple(self.tokens)
+            self.token_ids = frozen_array(self.token_ids)
+            self.series = CyclicSeries(self.tokens, self.token_ids, self.max)
+        if values is not None:
+            self.matrix = CompactMatrix(frozen_array(values), self.dimension,
+                    self.tokens)
+            self.backend = 'compact'
+        self.width
+
+        self._frozen = True
+
+        return self
+
+    def _list_values(self):
+        '''
+        Encode the cells of a built list matrix, as they stand, into one
+        flat, row-major array, laid out as by _compact_values().
+
+        Raise exception, if an integer cell is not a 64-bit integer, or if a
+        token cell is not in the vocabulary.
+        Return the array.
+        '''
+
+        from array import array
+        from itertools import chain
+        from backends import id_typecode
+
+        cells = chain.from_iterable(self.matrix)
+
+        if self.tokens is None:
+            try:
+                return array('q', cells)
+            except (OverflowError, TypeError):
+                raise AttributeError('not a matrix of 64-bit integers')
+
+        values = array(id_typecode(len(self.tokens)))
+        for cell in cells:
+            id = self._token_id(cell)
+            if id is None:
+                raise AttributeError(f'not a token in the vocabulary: "{cell}"')
+            values.append(id)
+
+        return values
+
+    def buffer(self):
+        '''
+        Expose the cells as a read-only, row-major memoryview of shape
+        (dimension, dimension), for zero-copy use by numpy, struct, or
+        socket writes.
+
+        Integer cells are 64-bit values. Token cells are ids into tokens,
+        the vocabulary. The array of a built compact matrix, which the
+        planner picks by default, is shared without copying. A list or
+        lazy matrix holds no such array, so each call generates a new one
+        from the spiral geometry, and edits to a list matrix are not seen;
+        freeze() a list matrix first to encode its cells, edits included,
+        into one array shared from then on.
+        Python 3.12 and later also accept the instance itself wherever a
+        buffer is taken.
+
+        Raise exception, if the integers exceed 64 bits.
+        Return the memoryview.
+        '''
+
+        from backends import CompactMatrix
+
+        if hasattr(self, 'matrix') and self.backend == 'compact':
+            return self.matrix.buffer()
+
+        return CompactMatrix(self._compact_values(), self.dimension).buffer()
+
+    def __buffer__(self, flags):
+
+        return self.buffer()
+
+    @property
+    def __array_interface__(self):
+        '''
+        Describe the cells of buffer() to numpy, so numpy.asarray() shares
+        them rather than walking the rows.
+        '''
+
+        from backends import array_interface
+
+        return array_interface(self.buffer())
 
     def _dimension(self, dimension):
         '''
@@ -179,46 +407,179 @@ class SpiralMatrix():
 
         return step
 
-    def _series(self, filename, words, start, step):
+    def _backend(self, backend):
         '''
-        Populate series via file content, word tokens, or range of integers.
+        Raise exception, if backend is not a known storage strategy.
 
-        Return series as a list() or a range().
+        Return backend, or the planned backend when None is given.
+        '''
+
+        if backend is None:
+            return self.plan['backend']
+
+        if backend not in self.builders:
+            raise AttributeError(f'not a backend: "{backend}"')
+
+        return backend
+
+    def _tokens(self, filename, words, tokens):
+        '''
+        Take the word tokens from file content, a string, or an iterable.
+
+        Return the 2-tuple of (vocabulary, ids) from _take(), or of
+        (None, None) for integers.
         '''
 
         if filename:
-            return self._series_from_file(filename)
+            return self._tokens_from_file(filename)
 
         if words:
-            return self._series_from_string(words)
+            return self._tokens_from_string(words)
 
-        return self._series_from_integers(start, step)
+        if tokens is not None:
+            return self._tokens_from_iterable(tokens)
 
-    def _series_from_file(self, filename):
+        return None, None
+
+    def _series(self, tokens, start, step):
         '''
-        Populate series using text from a local file.
+        Populate series via word tokens or range of integers.
+
+        Return series as a range(), or as a CyclicSeries() that repeats the
+        token ids lazily, without copying them.
+        '''
+
+        from backends import CyclicSeries
+
+        if tokens is None:
+            return self._series_from_integers(start, step)
+
+        return CyclicSeries(tokens, self.token_ids, self.max)
+
+    def _replicate(self, tokens):
+        '''
+        Repeat the tokens until there are enough to fill the matrix cells.
 
-        Raise exception, if the file is binary or is empty text.
         Return the series list.
         '''
 
         max = self.max
 
+        return (tokens * (int(max / len(tokens)) + 1))[:max]
+
+    def _take(self, tokens):
+        '''
+        Consume tokens from an iterable, stopping once max have been taken.
+
+        The tokens are interned as they are taken: each distinct token is
+        held once, in the vocabulary, and the tokens taken are held as ids
+        into it, in an array no wider than the vocabulary needs. Tokens
+        that cannot be hashed are matched by equality instead.
+
+        Return the 2-tuple of (vocabulary list, ids array).
+        '''
+
+        from array import array
+        from itertools import islice
+        from backends import id_typecode
+
+        vocabulary, known, ids = [], {}, array('B')
+        for token in islice(tokens, self.max):
+            try:
+                id = known.get(token)
+            except TypeError:
+                id = next((id for id, each in enumerate(vocabulary)
+                        if each == token), None)
+
+            if id is None:
+                id = len(vocabulary)
+                vocabulary.append(token)
+                try:
+                    known[token] = id
+                except TypeError:
+                    pass
+                if id_typecode(len(vocabulary)) != ids.typecode:
+                    ids = array(id_typecode(len(vocabulary)), ids)
+
+            ids.append(id)
+
+        return vocabulary, ids
+
+    def _tokens_from_file(self, filename):
+        '''
+        Read word tokens from the text of a local file, line by line.
+
+        Raise exception, if the file is binary or is empty text.
+        Return the 2-tuple of (vocabulary, ids), see _take().
+        '''
+
         try:
             with open(filename) as file:
-                series = file.read()
+                tokens = self._take(
+                        token for line in file for token in line.split())
         except UnicodeDecodeError:
             msg = f'"{filename}": not a text file'
             raise AttributeError(msg)
 
-        try:
-            series = series.split()
-            series = (series * (int(max / len(series)) + 1))[:max]
-        except:
+        if not tokens[1]:
             msg = f'"{filename}": empty file found'
             raise AttributeError(msg)
 
-        return series
+        return tokens
+
+    def _tokens_from_string(self, words):
+        '''
+        Split a space-delimited string into word tokens.
+
+        Raise exception, if the string holds no tokens.
+        Return the 2-tuple of (vocabulary, ids), see _take().
+        '''
+
+        tokens = self._take(words.split())
+
+        if not tokens[1]:
+            msg = f'no word tokens found: "{words}"'
+            raise AttributeError(msg)
+
+        return tokens
+
+    def _tokens_from_iterable(self, tokens):
+        '''
+        Take tokens from any iterable, e.g. a generator or database cursor.
+
+        No more than max items are consumed; when the iterable runs short,
+        series repeats the tokens taken, as it does for a short string.
+
+        Only iterability is checked here; an error raised by the iterable
+        itself, while it is being read, is passed on as it is.
+
+        Raise exception, if the iterable is not iterable or yields nothing.
+        Return the 2-tuple of (vocabulary, ids), see _take().
+        '''
+
+        try:
+            iterator = iter(tokens)
+        except TypeError:
+            raise AttributeError(f'not an iterable of tokens: "{tokens}"')
+
+        tokens = self._take(iterator)
+
+        if not tokens[1]:
+            raise AttributeError('no tokens found in the iterable')
+
+        return tokens
+
+    def _series_from_file(self, filename):
+        '''
+        Populate series using text from a local file.
+
+        Raise exception, if the file is binary or is empty text.
+        Return the series list.
+        '''
+
+        vocabulary, ids = self._tokens_from_file(filename)
+
+        return self._replicate([vocabulary[id] for id in ids])
 
     def _series_from_string(self, words):
         '''
@@ -227,12 +588,9 @@ class SpiralMatrix():
         Return the series list.
         '''
 
-        max = self.max
+        vocabulary, ids = self._tokens_from_string(words)
 
-        series = words.split()
-        series = (series * (int(max / len(series)) + 1))[:max]
-
-        return series
+        return self._replicate([vocabulary[id] for id in ids])
 
     def _series_from_integers(self, start, step):
         '''
@@ -251,6 +609,28 @@ class SpiralMatrix():
 
         return series
 
+    @property
+    def width(self):
+        '''
+        Cell-width for printing, computed on first use.
+
+        Only the padded text output of show() needs the width, so the
+        exporters never pay for the pass over series.
+        '''
+
+        # The widest integer of a monotonic range sits at one of its ends,
+        # and a token series is only ever made of its distinct tokens.
+        if self._cell_width is None:
+            if isinstance(self.series, range):
+                self._cell_width = self._width(
+                        [self.series[0], self.series[-1]])
+            elif self.tokens is not None:
+                self._cell_width = self._width(self.tokens)
+            else:
+                self._cell_width = self._width(self.series)
+
+        return self._cell_width
+
     def _width(self, series):
         '''
         Set cell-width for printing, equal to the widest element in the series.
@@ -335,26 +715,782 @@ class SpiralMatrix():
                 bearing = self._turn(turn, bearing)             #   turn
             cell = self._move(cell, bearing)                    # move
 
-    def show(self, axes=False):
+    def _build_compact(self):
+        '''
+        Generate the spiral matrix into one flat, row-major array.
+        '''
+
+        from backends import CompactMatrix
+
+        self.matrix = CompactMatrix(self._compact_values(), self.dimension,
+                self.tokens)
+
+    def _compact_values(self):
+        '''
+        Generate the cells into one flat, row-major array.
+
+        Each straight run of the spiral is written as one strided slice
+        assignment, so no per-cell Python work is done. Integers are stored
+        as 64-bit values; tokens as small ids into the tokens list.
+
+        Raise exception, if the integers exceed 64 bits.
+        Return the array.
+        '''
+
+        from array import array
+        from itertools import cycle, islice
+        from backends import id_typecode
+
+        dimension = self.dimension
+
+        if self.tokens is None:
+            typecode = 'q'
+            start, step = self.start, self.step
+            def run(index, length):
+                return range(start + index * step,
+                        start + (index + length) * step, step)
+        else:
+            ids = self.token_ids
+            typecode = id_typecode(len(self.tokens))
+            def run(index, length):
+                index %= len(ids)
+                return islice(cycle(ids), index, index + length)
+
+        values = array(typecode, bytes(array(typecode).itemsize * self.max))
+        try:
+            for index, length, (y, x), (dy, dx) in self._sides():
+                first = y * dimension + x
+                stride = dy * dimension + dx
+                stop = first + stride * length
+                values[first:stop if stop >= 0 else None:stride] = \
+                        array(typecode, run(index, length))
+        except OverflowError:
+            msg = f'start:{self.start}  step:{self.step}  max:{self.max}  ' \
+                    'exceeds 64-bit integers'
+            raise AttributeError(msg)
+
+        return values
+
+    @classmethod
+    def batch(cls, dimension, bearing='E', turn=False, starts=1, steps=1):
+        '''
+        Generate many integer spirals of one dimension, bearing and turn
+        that differ only in start and step, together in one flat array.
+
+        starts and steps are each an integer or a sequence of integers; a
+        single value is used with every value of the other. The series
+        index of every cell is laid out once and shared: configuration k
+        is that layout under the transform starts[k] + index * steps[k],
+        computed for all of its cells at once, so writing the values, not
+        Python work per cell, dominates the cost.
+
+        Raise exception, if a start or step is not valid, if the lengths
+        of starts and steps differ, or if any configuration exceeds 64-bit
+        integers.
+        Return a BatchMatrix of the spirals, in the order given.
+        '''
+
+        from array import array
+        from sys import byteorder
+        from backends import BatchMatrix
+        from planner import INT64_MAX, INT64_MIN
+
+        layout = cls(dimension, bearing, turn, 0, 1, dry_run=True)
+        dimension = layout.dimension
+
+        starts = [starts] if isinstance(starts, int) else list(starts)
+        steps = [steps] if isinstance(steps, int) else list(steps)
+        count = max(len(starts), len(steps))
+        if not starts or not steps or \
+                len(starts) not in (1, count) or len(steps) not in (1, count):
+            raise AttributeError(f'not matching lengths of starts and steps: '
+                    f'"{len(starts)}", "{len(steps)}"')
+        starts = [layout._start(start) for start in starts] * \
+                (count // len(starts))
+        steps = [layout._step(step) for step in steps] * (count // len(steps))
+
+        # Each configuration is checked, and sized, from its two ends.
+        cells, widths = layout.max, []
+        for k, (start, step) in enumerate(zip(starts, steps)):
+            last = start + (cells - 1) * step
+            if not INT64_MIN <= min(start, last) <= max(start, last) \
+                    <= INT64_MAX:
+                raise AttributeError(f'configuration {k}: start:{start}  '
+                        f'step:{step}  max:{cells}  exceeds 64-bit integers')
+            widths.append(max(len(str(start)), len(str(last))))
+
+        # Pack every cell as one 64-bit field of a single large integer,
+        # least significant first. Each field is biased by 2 ** 63 so it is
+        # never negative, and as no field then spills into the next, one
+        # scalar multiply-and-add of the packed integers computes the whole
+        # affine transform start + index * step at once, at memory speed.
+        # Flipping the top bit of each field removes the bias again.
+        index = layout._compact_values()
+        if byteorder == 'big':
+            index.byteswap()
+        index = int.from_bytes(index.tobytes(), 'little')
+        ones = int.from_bytes((b'\x01' + bytes(7)) * cells, 'little')
+        flip = bytes(byte ^ 0x80 for byte in range(256))
+
+        values = array('q', bytes(8 * cells * count))
+        raw = memoryview(values).cast('B')
+        for k, (start, step) in enumerate(zip(starts, steps)):
+            fields = bytearray(((start + 2 ** 63) * ones + step * index)
+                    .to_bytes(8 * cells, 'little'))
+            fields[7::8] = fields[7::8].translate(flip)
+            raw[8 * k * cells:8 * (k + 1) * cells] = fields
+        if byteorder == 'big':
+            values.byteswap()
+
+        return BatchMatrix(values, dimension, count, widths)
+
+    def _build_lazy(self):
+        '''
+        Defer the spiral matrix, generating each row only when it is read.
+        '''
+
+        from backends import LazyMatrix
+
+        self.matrix = LazyMatrix(self)
+
+    # Map each backend name to the method that builds its matrix.
+    builders = {
+        'list': _build,
+        'compact': _build_compact,
+        'lazy': _build_lazy,
+    }
+
+    def _frame(self):
+        '''
+        Determine the initial bearing and the bearing after the first turn.
+
+        Together these map the canonical spiral, which heads east and turns
+        left, onto this matrix: a canonical offset of (cy, cx) lands on the
+        grid at origin + cx * bearing - cy * turned.
+
+        Return the 2-tuple of the two compass bearings.
+        '''
+
+        return self.bearing, self.vector[self.turn][self.bearing]
+
+    def _sides(self):
+        '''
+        Generate the straight runs of the spiral progression, center outward.
+
+        Ring k (the cells k steps from the origin) begins at series index
+        (2k - 1) ** 2 and is made of four runs of 2k cells each.
+
+        Yield 4-tuples of (series index, run length, first cell, bearing).
+        '''
+
+        (b0, b1), (t0, t1) = self._frame()
+        oy, ox = self.origin
+
+        yield 0, 1, self.origin, self.bearing
+        for k in range(1, self.dimension // 2 + 1):
+            index = (2 * k - 1) ** 2
+            for (u, v), bearing in (((k, 1 - k), (t0, t1)),
+                                    ((k - 1, k), (-b0, -b1)),
+                                    ((-k, k - 1), (-t0, -t1)),
+                                    ((1 - k, -k), (b0, b1))):
+                cell = (oy + u * b0 + v * t0, ox + u * b1 + v * t1)
+                yield index, 2 * k, cell, bearing
+                index += 2 * k
+
+    def _canonical_row(self, c):
+        '''
+        Compute the series indices along canonical row c, west to east.
+
+        Return the list of indices.
+        '''
+
+        h = self.dimension // 2
+        k = abs(c)
+        base = (2 * k - 1) ** 2
+
+        west = [(2 * j - 1) ** 2 + 5 * j - 1 + c for j in range(h, k, -1)]
+        if c < 0:
+            middle = range(base + 4 * k - 1, base + 2 * k - 2, -1)
+        elif c > 0:
+            middle = range(base + 6 * k - 1, base + 8 * k)
+        else:
+            middle = [0]
+        east = [(2 * j - 1) ** 2 + j - 1 - c for j in range(k + 1, h + 1)]
+
+        return west + list(middle) + east
+
+    def _canonical_column(self, c):
+        '''
+        Compute the series indices along canonical column c, north to south.
+
+        Return the list of indices.
+        '''
+
+        h = self.dimension // 2
+        k = abs(c)
+        base = (2 * k - 1) ** 2
+
+        north = [(2 * j - 1) ** 2 + 3 * j - 1 - c for j in range(h, k, -1)]
+        if c > 0:
+            middle = list(range(base + 2 * k - 1, base - 1, -1))
+            middle.append(base + 8 * k - 1)
+        elif c < 0:
+            middle = range(base + 4 * k - 1, base + 6 * k)
+        else:
+            middle = [0]
+        south = [(2 * j - 1) ** 2 + 7 * j - 1 + c for j in range(k + 1, h + 1)]
+
+        return north + list(middle) + south
+
+    def _row_indices(self, y):
+        '''
+        Compute the series indices of row y directly from the geometry.
+
+        Return the list of indices, west to east.
+        '''
+
+        (b0, b1), (t0, t1) = self._frame()
+        dy = y - self.dimension // 2
+
+        # Grid rows are canonical rows when the spiral heads east or west,
+        # and canonical columns when it heads north or south.
+        if b1:
+            line = self._canonical_row(-dy * t0)
+            return line if b1 > 0 else line[::-1]
+
+        line = self._canonical_column(dy * b0)
+        return line if t1 < 0 else line[::-1]
+
+    def _column_indices(self, x):
+        '''
+        Compute the series indices of column x directly from the geometry.
+
+        Return the list of indices, north to south.
+        '''
+
+        (b0, b1), (t0, t1) = self._frame()
+        dx = x - self.dimension // 2
+
+        # Grid columns are canonical columns when the spiral heads east or
+        # west, and canonical rows when it heads north or south.
+        if b1:
+            line = self._canonical_column(dx * b1)
+            return line if t0 < 0 else line[::-1]
+
+        line = self._canonical_row(-dx * t1)
+        return line if b0 > 0 else line[::-1]
+
+    def _index(self, y, x):
+        '''
+        Compute the series index of the cell at (y, x) from the geometry.
+
+        Return the index integer.
+        '''
+
+        (b0, b1), (t0, t1) = self._frame()
+        dy, dx = y - self.dimension // 2, x - self.dimension // 2
+        cx = dy * b0 + dx * b1
+        cy = -(dy * t0 + dx * t1)
+
+        k = max(abs(cx), abs(cy))
+        if not k:
+            return 0
+
+        base = (2 * k - 1) ** 2
+        if cx == k and cy < k:
+            return base + k - 1 - cy
+        if cy == -k:
+            return base + 3 * k - 1 - cx
+        if cx == -k:
+            return base + 5 * k - 1 + cy
+        return base + 7 * k - 1 + cx
+
+    def _coords(self, index):
+        '''
+        Compute the grid coordinates of the cell at a series index.
+
+        This is the inverse of _index().
+
+        Return the 2-tuple of (y, x) coordinates.
+        '''
+
+        from math import isqrt
+
+        k = (isqrt(index) + 1) // 2
+        if not k:
+            return self.origin
+
+        # Find the side of ring k, and the offset along it.
+        side, r = divmod(index - (2 * k - 1) ** 2, 2 * k)
+        cy, cx = ((k - 1 - r, k), (-k, k - 1 - r),
+                  (-k + 1 + r, -k), (k, -k + 1 + r))[side]
+
+        (b0, b1), (t0, t1) = self._frame()
+        oy, ox = self.origin
+
+        return (oy + cx * b0 - cy * t0, ox + cx * b1 - cy * t1)
+
+    def _position(self, i, limit=None):
+        '''
+        Raise exception, if i is not an integer from 0 up to limit.
+
+        The limit defaults to the last row or column. Return i as type int().
+        '''
+
+        if limit is None:
+            limit = self.dimension - 1
+
+        msg = f'not an integer from 0 to {limit}: "{i}"'
+
+        try:
+            i = int(i)
+        except (TypeError, ValueError):
+            raise AttributeError(msg)
+
+        if not 0 <= i <= limit:
+            raise AttributeError(msg)
+
+        return i
+
+    def _line(self, line, i=None):
+        '''
+        Compute the series indices of one line of cells from the geometry.
+
+        The line is 'matrix' (every cell), 'row' i, 'column' i, 'ring' i,
+        'diagonal', or 'anti_diagonal'.
+
+        Raise exception, if the line or i is not valid.
+        Return a range() for the matrix and rings, a list() otherwise.
+        '''
+
+        dimension = self.dimension
+
+        if line == 'matrix':
+            return range(self.max)
+
+        if line == 'row':
+            return self._row_indices(self._position(i))
+
+        if line == 'column':
+            return self._column_indices(self._position(i))
+
+        # A ring is one contiguous slice of the series.
+        if line == 'ring':
+            k = self._position(i, dimension // 2)
+            return range((2 * k - 1) ** 2, (2 * k + 1) ** 2) if k else range(1)
+
+        if line == 'diagonal':
+            return [self._index(n, n) for n in range(dimension)]
+
+        if line == 'anti_diagonal':
+            return [self._index(n, dimension - 1 - n) for n in range(dimension)]
+
+        raise AttributeError(f'not a line of cells: "{line}"')
+
+    def row(self, i):
+        '''
+        Compute the elements of row i, without reading the matrix.
+
+        Return the list of elements, west to east.
+        '''
+
+        series = self.series
+
+        return [series[index] for index in self._line('row', i)]
+
+    def column(self, j):
+        '''
+        Compute the elements of column j, without reading the matrix.
+
+        Return the list of elements, north to south.
+        '''
+
+        series = self.series
+
+        return [series[index] for index in self._line('column', j)]
+
+    def ring(self, k):
+        '''
+        Compute the elements of ring k, the cells k steps out from the origin.
+
+        Return the list of elements, in spiral order.
+        '''
+
+        indices = self._line('ring', k)
+
+        return list(self.series[indices.start:indices.stop])
+
+    def diagonal(self):
+        '''
+        Compute the elements of the diagonal from top-left to bottom-right.
+
+        Return the list of elements, north to south.
+        '''
+
+        series = self.series
+
+        return [series[index] for index in self._line('diagonal')]
+
+    def anti_diagonal(self):
+        '''
+        Compute the elements of the diagonal from top-right to bottom-left.
+
+        Return the list of elements, north to south.
+        '''
+
+        series = self.series
+
+        return [series[index] for index in self._line('anti_diagonal')]
+
+    def aggregate(self, line='matrix', i=None):
+        '''
+        Compute the count, sum, min and max of one line of integer cells.
+
+        The line is named as for _line(). Every element is start + step *
+        index, so each statistic follows from the series indices alone: in
+        constant time for the matrix and rings, and in time proportional to
+        dimension for the other lines. No cell is read.
+
+        Raise exception, if the series is made of word tokens.
+        Return a dict() of 'count', 'sum', 'min' and 'max'.
+        '''
+
+        if self.tokens is not None:
+            raise AttributeError('not an integer series: word tokens found')
+
+        indices = self._line(line, i)
+        count = len(indices)
+
+        if isinstance(indices, range):
+            total = (indices[0] + indices[-1]) * count // 2
+            low, high = indices[0], indices[-1]
+        else:
+            total, low, high = sum(indices), min(indices), max(indices)
+
+        start, step = self.start, self.step
+        if step < 0:
+            low, high = high, low
+
+        return {
+            'count': count,
+            'sum': count * start + step * total,
+            'min': start + step * low,
+            'max': start + step * high,
+        }
+
+    def show(self, axes=False, file=None, compress=None, resume=False,
+            checkpoint=None, jobs=None):
         '''
         Print the 2-d matrix structure.
+
+        The output goes to stdout unless a filename or writable text stream
+        is given. It is written one row at a time, and compressed along the
+        way when compress names a codec ('gzip', 'xz', or 'bz2') or the
+        filename ends in '.gz', '.xz', or '.bz2'.
+
+        When resume is set, the output is written as with export().
+
+        When jobs is given and the file is an uncompressed filename, that
+        many processes lay out bands of rows at once, each writing its band
+        straight to its place in the file. This relies on every line having
+        a known byte size, which holds unless a token is not ASCII; then,
+        the rows are written in order as usual.
         '''
 
-        # Print column-labels across the top, if needed.
-        if axes:
-            print('    ', end='')
-            for n in range(self.dimension):
-                print('%*s ' % (self.width, n), end='')
-            print()
+        import os
+        from exporters import codec_for, text_layout, text_line_size, \
+                write_parallel
+
+        arguments = (self.dimension, self.width, axes)
+
+        if jobs is not None:
+            if not (isinstance(jobs, int) and jobs > 0):
+                raise AttributeError(f'not a positive integer: "{jobs}"')
+            if resume:
+                raise AttributeError('not resumable with jobs')
+
+            fixed = self.tokens is None or \
+                    all(str(token).isascii() for token in self.tokens)
+            if fixed and isinstance(file, str) and not compress and \
+                    not codec_for(file) and hasattr(os, 'pwrite'):
+                write_parallel(self._unbuilt().row, file, text_layout,
+                        text_line_size, arguments, jobs)
+                return
+
+        self._write(text_layout(*arguments), file, compress, resume,
+                checkpoint, ('text', axes))
+
+    def _unbuilt(self):
+        '''
+        Copy this spiral without building the copy, so that the copy
+        pickles as its construction parameters alone.
+
+        Return the copy.
+        '''
+
+        return type(self)(**self._parameters(testing=True))
+
+    def rows(self, first=0):
+        '''
+        Generate the rows of the 2-d matrix structure, top to bottom.
+
+        Generating starts at row first; the rows above it are never built.
+        When the matrix itself was not built, each row is computed from the
+        spiral geometry instead.
+        '''
+
+        row = self.matrix.__getitem__ if hasattr(self, 'matrix') else self.row
+        for i in range(first, self.dimension):
+            yield row(i)
+
+    def _write(self, layout, file, compress, resume, checkpoint, output):
+        '''
+        Write the rows in a layout, resumably if needed, for show() and
+        export(). The output tuple names the format, for the checkpoint.
+        '''
+
+        from exporters import codec_for, open_output, write_resumable, \
+                write_rows
+
+        if not resume:
+            with open_output(file, compress) as stream:
+                write_rows(self.rows(), stream, layout)
+            return
+
+        if not isinstance(file, str) or compress or codec_for(file):
+            raise AttributeError(
+                    f'not an uncompressed filename to resume: "{file}"')
+        if checkpoint is not None and \
+                not (isinstance(checkpoint, int) and checkpoint > 0):
+            raise AttributeError(f'not a positive integer: "{checkpoint}"')
+
+        write_resumable(self.rows, file, layout, self._job(output),
+                checkpoint)
+
+    def _job(self, output):
+        '''
+        Fingerprint the output format and every parameter that shapes the
+        output, so a checkpoint is only resumed by the same job.
+
+        Return the fingerprint string.
+        '''
+
+        from zlib import crc32
+
+        parameters = (output, self.dimension, self.bearing, self.turn,
+                self.start, self.step)
+        checksum = crc32(repr(parameters).encode('utf-8'))
+        if self.tokens is not None:
+            for token in self.tokens:
+                checksum = crc32(repr(token).encode('utf-8') + b'\n',
+                        checksum)
+            checksum = crc32(self.token_ids.tobytes(), checksum)
+
+        return f'{output[0]}:{checksum:08x}'
+
+    def primes(self, segment=None):
+        '''
+        Mark the cells holding prime numbers, as in an Ulam spiral.
+
+        The series is sieved a segment at a time, without building the
+        matrix, and each straight run of the spiral is copied onto the grid
+        as one strided slice. Only the sieve segment and the grid of flags
+        are held in memory.
+
+        Raise exception, if the series is made of word tokens, or if the
+        grid of flags, one byte per cell, exceeds the memory budget.
+        Return a CompactMatrix of flags, 1 for a prime and 0 otherwise.
+        '''
+
+        from array import array
+        from backends import CompactMatrix
+        from sieve import SEGMENT_SIZE, prime_flags
+
+        if self.tokens is not None:
+            raise AttributeError('not an integer series: word tokens found')
+
+        if self.max > self.plan['budget']:
+            raise AttributeError(f'primes mask of {self.max} bytes exceeds '
+                    f'the memory budget of {self.plan["budget"]} bytes')
+
+        dimension = self.dimension
+        flags = prime_flags(self.start, self.step, self.max,
+                segment or SEGMENT_SIZE)
+
+        mask = array('B', bytes(self.max))
+        cells = memoryview(mask)
+        chunk, at = bytearray(), 0
+        for index, length, (y, x), (dy, dx) in self._sides():
+            while at + length > len(chunk):
+                chunk, at = chunk[at:] + next(flags), 0
+            first = y * dimension + x
+            stride = dy * dimension + dx
+            stop = first + stride * length
+            cells[first:stop if stop >= 0 else None:stride] = \
+                    chunk[at:at + length]
+            at += length
+
+        return CompactMatrix(mask, dimension)
+
+    def find(self, element):
+        '''
+        Find every cell holding an element, without reading the matrix.
+
+        The token ids repeat with a period of P, the count of tokens taken,
+        so the id at position p of token_ids fills series indices p, p + P,
+        p + 2P, and so on. A map from each token to its id, and from each id
+        to its positions, is made on first use, so a lookup costs only as
+        much as the hits it yields. An integer is found at its one series
+        index.
+
+        Yield the (y, x) coordinates of each cell, in spiral order.
+        '''
+
+        max = self.max
+
+        if self.tokens is None:
+            index, remainder = divmod(element - self.start, self.step) \
+                    if isinstance(element, int) else (-1, 1)
+            if not remainder and 0 <= index < max:
+                yield self._coords(index)
+            return
+
+        positions = self._token_positions(element)
+        if not positions:
+            return
+        for base in range(0, max, len(self.token_ids)):
+            for position in positions:
+                if base + position >= max:
+                    return
+                yield self._coords(base + position)
+
+    def _token_positions(self, token):
+        '''
+        Look up the positions of a token within the cycle of token ids.
+
+        Return the list of positions, in order.
+        '''
+
+        id = self._token_id(token)
+        if id is None:
+            return []
+
+        if self._positions is None:
+            positions = {}
+            for position, each in enumerate(self.token_ids):
+                positions.setdefault(each, []).append(position)
+            self._positions = positions
+
+        return self._positions[id]
+
+    def _token_id(self, token):
+        '''
+        Look up the id of a token in the vocabulary, through a map from each
+        token to its id that is made on first use. Tokens that cannot be
+        hashed are matched by equality instead.
+
+        Return the id, or None if the token is not in the vocabulary.
+        '''
+
+        if self._token_index is None:
+            index = {}
+            for id, each in enumerate(self.tokens):
+                try:
+                    index.setdefault(each, id)
+                except TypeError:
+                    pass
+            self._token_index = index
+
+        try:
+            return self._token_index.get(token)
+        except TypeError:
+            return next((id for id, each in enumerate(self.tokens)
+                    if each == token), None)
+
+    def _levels(self, i):
+        '''
+        Scale the elements of row i onto levels from 0 to 255.
+
+        Integers scale from the least to the greatest element of series;
+        tokens scale by their id in the vocabulary.
+
+        Return the levels as a bytes().
+        '''
+
+        indices = self._row_indices(i)
+
+        if self.tokens is not None:
+            ids, period = self.token_ids, len(self.token_ids)
+            last = len(self.tokens) - 1 or 1
+            return bytes([ids[index % period] * 255 // last
+                    for index in indices])
+
+        last = self.max - 1 or 1
+        if self.step < 0:
+            return bytes([(last - index) * 255 // last for index in indices])
+
+        return bytes([index * 255 // last for index in indices])
+
+    def render(self, file, format=None, colormap='gray', downsample=1,
+            primes=False):
+        '''
+        Write the matrix as an image, one scanline at a time.
+
+        Each cell becomes one pixel, shaded by its value (or, with primes,
+        by whether it holds a prime number) through the colormap. The
+        format is 'pnm' (PGM or PPM) or 'png', or is implied by the
+        filename. With downsample, each block of that many cells square is
+        averaged into one pixel.
+
+        Rows are generated from the geometry, so the matrix need not be
+        built and only a few rows are held at once. The primes flags are
+        the exception, being held for the whole grid, one byte per cell,
+        within the memory budget: each row of the spiral crosses every ring
+        around it, so sieving rows in order would sieve two short segments
+        per ring per row, at many times the cost of one sieve of the series.
+        '''
+
+        from image import write_image
+
+        dimension = self.dimension
+        downsample = self._position(downsample, dimension)
+        if not downsample:
+            raise AttributeError(f'not a positive integer: "{downsample}"')
+
+        if primes:
+            flags = self.primes().values
+            table = bytes([0, 255]) + bytes(254)
+            rows = (flags[i * dimension:(i + 1) * dimension].tobytes()
+                    .translate(table) for i in range(dimension))
+        else:
+            rows = (self._levels(i) for i in range(dimension))
+
+        write_image(rows, dimension, file, format, colormap, downsample)
+
+    def export(self, format='csv', file=None, compress=None, resume=False,
+            checkpoint=None):
+        '''
+        Write the matrix structure row by row in a machine-readable format.
+
+        The format is one of 'csv', 'tsv', 'jsonl', or 'json'. The file is
+        either a filename, a writable text stream, or None for stdout. The
+        output is compressed as with show().
+
+        When resume is set, the file must be an uncompressed filename. A
+        checkpoint of the rows written so far is kept beside it, in a file
+        ending '.checkpoint', every checkpoint rows (default: 1000). If the
+        write is cut short, the same call picks up after the last
+        checkpoint, once the partial output is verified against it.
+        '''
+
+        from exporters import exporters
+
+        try:
+            layout = exporters[format](self.dimension)
+        except KeyError:
+            raise AttributeError(f'not an export format: "{format}"')
 
-        # Print the matrix structure.
-        # Prefix a row-label before each row, if needed.
-        for i in range(self.dimension):
-            if axes:
-                print('%2s  ' % (i), end='')
-            for j in range(self.dimension):
-                print('%*s ' % (self.width, self.matrix[i][j]), end='')
-            print()
+        self._write(layout, file, compress, resume, checkpoint, (format,))
 
 ################################################################################
 def main():
@@ -362,21 +1498,59 @@ def main():
     Handle the case where this module is launched from the command-line.
     '''
 
+    from itertools import chain
     from sys import stdin
     from command_line import CommandLineInterface
 
-    # Parse command-line arguments and stdin.
+    # Parse command-line arguments, and read tokens from stdin lazily;
+    # when stdin holds no tokens, fall back to integers, as for no words.
     # Print usage help, if needed.
     cli = CommandLineInterface(SpiralMatrix)
     args = cli.parser.parse_args()
+    tokens = None
     if args.words == None:
-        args.words = stdin.read()
+        tokens = (token for line in stdin for token in line.split())
+        first = next(tokens, None)
+        tokens = None if first is None else chain([first], tokens)
 
     # Instantiate and print the spiral matrix.
     m = SpiralMatrix(dimension=args.DIMENSION, bearing=args.bearing,
                 turn=args.right, start=args.center, step=args.step,
-                filename=args.file, words=args.words)
-    m.show(axes=args.axes)
+                filename=args.file, words=args.words, backend=args.backend,
+                budget=args.budget and args.budget * 2 ** 20,
+                dry_run=args.dry_run or args.primes or bool(args.image)
+                        or args.resume
+                        or bool(args.jobs and args.format == 'text'),
+                tokens=tokens)
+    if args.dry_run:
+        from planner import describe
+        print(describe(m.plan))
+        return
+
+    # Render an image, instead of printing.
+    if args.image:
+        m.render(args.image, colormap=args.colormap,
+                downsample=args.downsample, primes=args.primes)
+        return
+
+    # Print the Ulam spiral of primes, instead of the series values.
+    if args.primes:
+        from exporters import exporters, open_output, write_flags, \
+                write_rows
+        mask = m.primes()
+        with open_output(args.output, args.compress) as stream:
+            if args.format == 'text':
+                write_flags(mask, stream, args.axes)
+            else:
+                write_rows(mask, stream, exporters[args.format](m.dimension))
+        return
+
+    if args.format == 'text':
+        m.show(axes=args.axes, file=args.output, compress=args.compress,
+                resume=args.resume, jobs=args.jobs)
+    else:
+        m.export(format=args.format, file=args.output, compress=args.compress,
+                resume=args.resume)
 
 if __name__ == '__main__':
     main()
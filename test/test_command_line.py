@@ -6,6 +6,9 @@
 
 import unittest
 import argparse
+import os
+import subprocess
+import sys
 from spiral_matrix.spiral_matrix import SpiralMatrix
 from spiral_matrix.command_line import CommandLineInterface
 
@@ -101,6 +104,36 @@ class CommandLineInterfaceTestCase(unittest.TestCase):
                 with self.assertRaises(argparse.ArgumentTypeError):
                     self.cli.arg_is_text_file(config)
 
+    def test_08_arg_is_gt0_int(self):
+
+        pass_configs = [1, '64', 2048]
+        for config in pass_configs:
+            with self.subTest(config=config):
+                self.assertEqual(self.cli.arg_is_gt0_int(config), int(config))
+
+        fail_configs = [0, -1, '1.5', 'foo', '', None]
+        for config in fail_configs:
+            with self.subTest(config=config):
+                with self.assertRaises(argparse.ArgumentTypeError):
+                    self.cli.arg_is_gt0_int(config)
+
+    def test_09_words_from_stdin(self):
+
+        script = os.path.join(os.path.dirname(__file__), os.pardir,
+                'spiral_matrix', 'spiral_matrix.py')
+        pass_configs = [
+            { 'stdin': '', 'want': '5 4 3 \n6 1 2 \n7 8 9 \n' },
+            { 'stdin': ' \n\n', 'want': '5 4 3 \n6 1 2 \n7 8 9 \n' },
+            { 'stdin': 'a\nb\n', 'want': 'a b a \nb a b \na b a \n' },
+        ]
+        for config in pass_configs:
+            with self.subTest(config=config):
+                stdin, want = config.values()
+                done = subprocess.run([sys.executable, script, '3', '-w'],
+                        input=stdin, capture_output=True, text=True)
+                self.assertEqual(done.returncode, 0, done.stderr)
+                self.assertEqual(done.stdout, want)
+
 ################################################################################
 if __name__ == '__main__':
     unittest.main(verbosity=2)
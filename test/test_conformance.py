@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# vim: set ff=unix fenc=utf-8 et ts=4 sts=4 sta sw=4:
+#
+# test_conformance.py
+#
+# Check every backend against the reference spiral walk, SpiralMatrix._build,
+# and check that no backend has become slower than its stored baseline.
+#
+# Timings are stored relative to a timing taken in the same run, so the
+# baseline holds across machines: each backend relative to the reference
+# walk, and the reference walk itself relative to a fixed workload that uses
+# only the standard library. To record a new baseline, run:
+#
+#   SPIRAL_MATRIX_PERF_UPDATE=1 python -m pytest test/test_conformance.py
+#
+# SPIRAL_MATRIX_PERF_TOLERANCE sets the allowed slowdown (default: 1.0, i.e.
+# twice as slow), and SPIRAL_MATRIX_PERF_SKIP=1 skips the timing check.
+
+import json
+import os
+import random
+import timeit
+import unittest
+from spiral_matrix.spiral_matrix import SpiralMatrix
+
+cwd = os.path.dirname(__file__)
+baseline_file = f'{cwd}/perf-baseline.json'
+
+bearings = ['E', 'N', 'W', 'S']
+turns = [False, True]
+backends = [backend for backend in SpiralMatrix.builders if backend != 'list']
+token_files = [
+    f'{cwd}/test-input/3-letter-words.txt',
+    f'{cwd}/test-input/5-letter-words.txt',
+    f'{cwd}/test-input/lorem-ipsum.txt',
+]
+
+def workload(dimension):
+    '''
+    Fill as many cells as a matrix of dimension holds, one at a time, with
+    plain Python; it calls no spiral_matrix code, so it times the machine.
+    '''
+
+    cells = [[None] * dimension for y in range(dimension)]
+    for y in range(dimension):
+        row = cells[y]
+        for x in range(dimension):
+            row[x] = y * dimension + x
+
+    return cells
+
+def reference(*args, **kwargs):
+    '''
+    Build a matrix with the reference walk.
+    '''
+
+    return SpiralMatrix(*args, backend='list', **kwargs)
+
+################################################################################
+class ConformanceTestCase(unittest.TestCase):
+
+    def assertConforms(self, *args, **kwargs):
+
+        want = reference(*args, **kwargs)
+        for backend in backends:
+            with self.subTest(backend=backend):
+                m = SpiralMatrix(*args, backend=backend, **kwargs)
+                self.assertEqual(m.matrix, want.matrix)
+                self.assertEqual(list(m.rows()), want.matrix)
+                self.assertEqual(m.width, want.width)
+
+    def test_01_bearing_and_turn(self):
+
+        for bearing in bearings:
+            for turn in turns:
+                with self.subTest(bearing=bearing, turn=turn):
+                    self.assertConforms(11, bearing, turn)
+
+    def test_02_random_start_and_step(self):
+
+        rng = random.Random(2018)
+        for i in range(40):
+            start = rng.randint(-10 ** 6, 10 ** 6)
+            step = rng.choice([-1, 1]) * rng.randint(1, 1000)
+            bearing = rng.choice(bearings)
+            turn = rng.choice(turns)
+            with self.subTest(start=start, step=step, bearing=bearing,
+                    turn=turn):
+                self.assertConforms(9, bearing, turn, start, step)
+
+    def test_03_token_files(self):
+
+        for filename in token_files:
+            for bearing in bearings:
+                for turn in turns:
+                    with self.subTest(filename=filename, bearing=bearing,
+                            turn=turn):
+                        self.assertConforms(
+                                13, bearing, turn, filename=filename)
+
+    def test_04_dimension_sweep(self):
+
+        for dimension in list(range(1, 42, 2)) + [63, 101]:
+            with self.subTest(dimension=dimension):
+                self.assertConforms(dimension, 'W', True, -5, 3)
+                self.assertConforms(dimension, 'N', False,
+                        words='eenie meenie minie moe')
+
+    def test_05_beyond_64_bits(self):
+
+        want = reference(7, start=2 ** 70, step=-3)
+        for backend in backends:
+            with self.subTest(backend=backend):
+                if backend == 'compact':
+                    with self.assertRaises(AttributeError):
+                        SpiralMatrix(7, start=2 ** 70, step=-3,
+                                backend=backend)
+                else:
+                    m = SpiralMatrix(7, start=2 ** 70, step=-3,
+                            backend=backend)
+                    self.assertEqual(m.matrix, want.matrix)
+
+################################################################################
+@unittest.skipIf(os.environ.get('SPIRAL_MATRIX_PERF_SKIP'),
+        'SPIRAL_MATRIX_PERF_SKIP is set')
+class PerformanceTestCase(unittest.TestCase):
+
+    dimension = 201
+    repeat = 7
+
+    def timing(self, backend, **kwargs):
+        '''
+        Time building a matrix and reading back every row, best of repeat.
+        '''
+
+        def run():
+            for row in SpiralMatrix(self.dimension, backend=backend,
+                    **kwargs).rows():
+                pass
+
+        return min(timeit.repeat(run, number=1, repeat=self.repeat))
+
+    def test_01_regression_gate(self):
+
+        tolerance = float(os.environ.get('SPIRAL_MATRIX_PERF_TOLERANCE', 1.0))
+        series = {
+            'integers': {},
+            'tokens': { 'filename': token_files[2] },
+        }
+
+        fixed = min(timeit.repeat(lambda: workload(self.dimension),
+                number=1, repeat=self.repeat))
+
+        ratios = {}
+        for name, kwargs in series.items():
+            walk = self.timing('list', **kwargs)
+            ratios[f'list:{name}'] = walk / fixed
+            for backend in backends:
+                ratios[f'{backend}:{name}'] = \
+                        self.timing(backend, **kwargs) / walk
+
+        if os.environ.get('SPIRAL_MATRIX_PERF_UPDATE'):
+            with open(baseline_file, 'w') as file:
+                json.dump(ratios, file, indent=4, sort_keys=True)
+                file.write('\n')
+
+        with open(baseline_file) as file:
+            baseline = json.load(file)
+
+        for key, ratio in ratios.items():
+            with self.subTest(key=key):
+                self.assertIn(key, baseline)
+                against = 'the fixed workload' if key.startswith('list:') \
+                        else 'the reference walk'
+                self.assertLessEqual(ratio, baseline[key] * (1 + tolerance),
+                        f'{key} is {ratio:.4f} of {against}, '
+                        f'baseline {baseline[key]:.4f}')
+
+################################################################################
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# vim: set ff=unix fenc=utf-8 et ts=4 sts=4 sta sw=4:
+#
+# test_exporters.py
+
+import bz2
+import gzip
+import io
+import json
+import lzma
+import os
+import tempfile
+import unittest
+from spiral_matrix.spiral_matrix import SpiralMatrix
+
+################################################################################
+class ExportersTestCase(unittest.TestCase):
+
+    def test_01_export_formats(self):
+
+        pass_configs = [
+            { 'format': 'csv', 'words': None,
+              'want_text': '5,4,3\n6,1,2\n7,8,9\n' },
+            { 'format': 'tsv', 'words': None,
+              'want_text': '5\t4\t3\n6\t1\t2\n7\t8\t9\n' },
+            { 'format': 'jsonl', 'words': None,
+              'want_text': '[5, 4, 3]\n[6, 1, 2]\n[7, 8, 9]\n' },
+            { 'format': 'json', 'words': None,
+              'want_text': '[[5, 4, 3],\n [6, 1, 2],\n [7, 8, 9]]\n' },
+            { 'format': 'csv', 'words': 'a b,c d',
+              'want_text': '"b,c",a,d\nd,a,"b,c"\na,"b,c",d\n' },
+        ]
+        for config in pass_configs:
+            with self.subTest(config=config):
+                format, words, want_text = config.values()
+                m = SpiralMatrix(3, words=words)
+                stream = io.StringIO()
+                m.export(format, stream)
+                self.assertEqual(stream.getvalue(), want_text)
+
+        fail_configs = ['xml', '', None]
+        for config in fail_configs:
+            with self.subTest(config=config):
+                m = SpiralMatrix(3)
+                with self.assertRaises(AttributeError):
+                    m.export(config, io.StringIO())
+
+    def test_02_export_skips_width(self):
+
+        m = SpiralMatrix(5)
+        stream = io.StringIO()
+        m.export('json', stream)
+        self.assertIsNone(m._cell_width)
+        self.assertEqual(json.loads(stream.getvalue()), m.matrix)
+
+    def test_03_compressed_output(self):
+
+        pass_configs = [
+            { 'filename': 'out.txt.gz', 'compress': None, 'opener': gzip.open },
+            { 'filename': 'out.txt.xz', 'compress': None, 'opener': lzma.open },
+            { 'filename': 'out.txt.bz2', 'compress': None, 'opener': bz2.open },
+            { 'filename': 'out.txt', 'compress': 'gzip', 'opener': gzip.open },
+            { 'filename': 'out.txt', 'compress': None, 'opener': open },
+        ]
+        for config in pass_configs:
+            with self.subTest(config=config):
+                filename, compress, opener = config.values()
+                m = SpiralMatrix(5, words='eenie meenie minie moe')
+                want_show, want_csv = io.StringIO(), io.StringIO()
+                m.show(True, want_show)
+                m.export('csv', want_csv)
+                with tempfile.TemporaryDirectory() as tmp:
+                    filename = os.path.join(tmp, filename)
+                    m.show(True, filename, compress)
+                    with opener(filename, 'rt') as file:
+                        self.assertEqual(file.read(), want_show.getvalue())
+                    m.export('csv', filename, compress)
+                    with opener(filename, 'rt') as file:
+                        self.assertEqual(file.read(), want_csv.getvalue())
+
+        fail_configs = ['zip', 'gz']
+        for config in fail_configs:
+            with self.subTest(config=config):
+                m = SpiralMatrix(3)
+                with self.assertRaises(AttributeError):
+                    m.show(file=io.BytesIO(), compress=config)
+
+    def test_04_resumable_output(self):
+
+        class Interrupted(Exception):
+            pass
+
+        pass_configs = [
+            { 'method': 'show', 'args': (True,), 'backend': 'lazy' },
+            { 'method': 'export', 'args': ('json',), 'backend': 'compact' },
+            { 'method': 'export', 'args': ('csv',), 'backend': 'list' },
+        ]
+        for config in pass_configs:
+            with self.subTest(config=config):
+                method, args, backend = config.values()
+                m = SpiralMatrix(11, words='eenie meenie minie moe',
+                        backend=backend)
+                want = io.StringIO()
+                getattr(m, method)(*args, want)
+
+                # Cut the first attempt short after 7 rows, then resume.
+                firsts = []
+                def rows(first=0):
+                    firsts.append(first)
+                    for i, row in enumerate(SpiralMatrix.rows(m, first),
+                            first):
+                        if i == 7 and len(firsts) == 1:
+                            raise Interrupted
+                        yield row
+                m.rows = rows
+
+                with tempfile.TemporaryDirectory() as tmp:
+                    filename = os.path.join(tmp, 'out.txt')
+                    with self.assertRaises(Interrupted):
+                        getattr(m, method)(*args, filename, resume=True,
+                                checkpoint=3)
+                    self.assertTrue(os.path.exists(filename + '.checkpoint'))
+                    getattr(m, method)(*args, filename, resume=True,
+                            checkpoint=3)
+                    self.assertEqual(firsts, [0, 6])
+                    self.assertFalse(os.path.exists(filename + '.checkpoint'))
+                    with open(filename) as file:
+                        self.assertEqual(file.read(), want.getvalue())
+
+    def test_05_resume_verifies_partial_output(self):
+
+        class Interrupted(Exception):
+            pass
+
+        pass_configs = [
+            { 'damage': b'X', 'format': 'tsv', 'want_first': 0 },
+            { 'damage': None, 'format': 'csv', 'want_first': 0 },
+            { 'damage': None, 'format': 'tsv', 'want_first': 6 },
+        ]
+        for config in pass_configs:
+            with self.subTest(config=config):
+                damage, format, want_first = config.values()
+                m = SpiralMatrix(9)
+                want = io.StringIO()
+                m.export(format, want)
+
+                # Leave a checkpoint at row 6 of a tsv file, then restart.
+                firsts = []
+                def rows(first=0):
+                    firsts.append(first)
+                    for i, row in enumerate(SpiralMatrix.rows(m, first),
+                            first):
+                        if i == 7 and len(firsts) == 1:
+                            raise Interrupted
+                        yield row
+                m.rows = rows
+
+                with tempfile.TemporaryDirectory() as tmp:
+                    filename = os.path.join(tmp, 'out.txt')
+                    with self.assertRaises(Interrupted):
+                        m.export('tsv', filename, resume=True, checkpoint=3)
+                    if damage:
+                        with open(filename, 'r+b') as file:
+                            file.write(damage)
+                    m.export(format, filename, resume=True, checkpoint=3)
+                    self.assertEqual(firsts[-1], want_first)
+                    with open(filename) as file:
+                        self.assertEqual(file.read(), want.getvalue())
+
+        fail_configs = [
+            { 'file': None, 'compress': None, 'checkpoint': None },
+            { 'file': io.StringIO(), 'compress': None, 'checkpoint': None },
+            { 'file': 'out.txt.gz', 'compress': None, 'checkpoint': None },
+            { 'file': 'out.txt', 'compress': 'xz', 'checkpoint': None },
+            { 'file': 'out.txt', 'compress': None, 'checkpoint': 0 },
+            { 'file': 'out.txt', 'compress': None, 'checkpoint': '5' },
+        ]
+        for config in fail_configs:
+            with self.subTest(config=config):
+                file, compress, checkpoint = config.values()
+                m = SpiralMatrix(3)
+                with self.assertRaises(AttributeError):
+                    m.show(False, file, compress, resume=True,
+                            checkpoint=checkpoint)
+
+    def test_06_parallel_text_output(self):
+
+        pass_configs = [
+            { 'dimension': 101, 'words': None, 'axes': True },
+            { 'dimension': 9, 'words': None, 'axes': False },
+            { 'dimension': 9, 'words': 'a bb ccc', 'axes': True },
+            { 'dimension': 9, 'words': 'caf\u00e9 na\u00efve bb', 'axes': False },
+        ]
+        for config in pass_configs:
+            with self.subTest(config=config):
+                dimension, words, axes = config.values()
+                m = SpiralMatrix(dimension, words=words)
+                want = io.StringIO()
+                m.show(axes, want)
+                with tempfile.TemporaryDirectory() as tmp:
+                    filename = os.path.join(tmp, 'out.txt')
+                    m.show(axes, filename, jobs=3)
+                    with open(filename, encoding='utf-8') as file:
+                        self.assertEqual(file.read(), want.getvalue())
+
+        fail_configs = [
+            { 'jobs': 0, 'resume': False },
+            { 'jobs': '2', 'resume': False },
+            { 'jobs': 2, 'resume': True },
+        ]
+        for config in fail_configs:
+            with self.subTest(config=config):
+                jobs, resume = config.values()
+                m = SpiralMatrix(3)
+                with tempfile.TemporaryDirectory() as tmp:
+                    with self.assertRaises(AttributeError):
+                        m.show(False, os.path.join(tmp, 'out.txt'),
+                                resume=resume, jobs=jobs)
+
+################################################################################
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# vim: set ff=unix fenc=utf-8 et ts=4 sts=4 sta sw=4:
+#
+# test_image.py
+
+import io
+import os
+import struct
+import tempfile
+import unittest
+import zlib
+from spiral_matrix.image import downsample
+from spiral_matrix.spiral_matrix import SpiralMatrix
+
+def read_png(data):
+    '''
+    Check the chunk CRCs of PNG data and decode its scanlines.
+
+    Return the IHDR fields and the list of scanlines, filter bytes removed.
+    '''
+
+    assert data[:8] == b'\x89PNG\r\n\x1a\n'
+    at, header, compressed = 8, None, b''
+    while at < len(data):
+        length, = struct.unpack('>I', data[at:at + 4])
+        kind = data[at + 4:at + 8]
+        chunk = data[at + 8:at + 8 + length]
+        crc, = struct.unpack('>I', data[at + 8 + length:at + 12 + length])
+        assert crc == zlib.crc32(kind + chunk)
+        if kind == b'IHDR':
+            header = struct.unpack('>IIBBBBB', chunk)
+        elif kind == b'IDAT':
+            compressed += chunk
+        at += 12 + length
+
+    width, height, depth, colour = header[:4]
+    stride = width * (1 if colour == 0 else 3) + 1
+    raw = zlib.decompress(compressed)
+    lines = [raw[i:i + stride] for i in range(0, len(raw), stride)]
+    assert all(line[0] == 0 for line in lines)
+
+    return header, [line[1:] for line in lines]
+
+################################################################################
+class ImageTestCase(unittest.TestCase):
+
+    def test_01_render_png(self):
+
+        m = SpiralMatrix(7, start=10, step=5)
+        stream = io.BytesIO()
+        m.render(stream, format='png')
+        header, lines = read_png(stream.getvalue())
+        self.assertEqual(header, (7, 7, 8, 0, 0, 0, 0))
+        want = [bytes((cell - 10) // 5 * 255 // 48 for cell in row)
+                for row in m.matrix]
+        self.assertEqual(lines, want)
+
+    def test_02_render_pnm(self):
+
+        pass_configs = [
+            { 'colormap': 'gray', 'want_magic': b'P5', 'channels': 1 },
+            { 'colormap': 'heat', 'want_magic': b'P6', 'channels': 3 },
+            { 'colormap': lambda level: (0, 0, round(level * 255)),
+              'want_magic': b'P6', 'channels': 3 },
+        ]
+        for config in pass_configs:
+            with self.subTest(config=config):
+                colormap, want_magic, channels = config.values()
+                m = SpiralMatrix(9, step=-1)
+                stream = io.BytesIO()
+                m.render(stream, format='pnm', colormap=colormap)
+                data = stream.getvalue()
+                self.assertEqual(data[:11], want_magic + b'\n9 9\n255\n')
+                self.assertEqual(len(data), 11 + 81 * channels)
+
+    def test_03_render_primes(self):
+
+        m = SpiralMatrix(11)
+        stream = io.BytesIO()
+        m.render(stream, format='png', primes=True)
+        header, lines = read_png(stream.getvalue())
+        want = [bytes(255 * flag for flag in row) for row in m.primes()]
+        self.assertEqual(lines, want)
+
+    def test_04_downsample(self):
+
+        rows = [bytes([0, 10, 20, 30, 40])] * 2 + [bytes([100] * 5)] * 3
+        self.assertEqual(list(downsample(rows, 5, 2)), [
+            bytes([5, 25, 40]),
+            bytes([100, 100, 100]),
+            bytes([100, 100, 100]),
+        ])
+
+        m = SpiralMatrix(9)
+        stream = io.BytesIO()
+        m.render(stream, format='png', downsample=4)
+        header, lines = read_png(stream.getvalue())
+        self.assertEqual(header[:2], (3, 3))
+
+    def test_05_fail(self):
+
+        fail_configs = [
+            { 'format': 'gif', 'colormap': 'gray', 'downsample': 1 },
+            { 'format': 'png', 'colormap': 'rainbow', 'downsample': 1 },
+            { 'format': 'png', 'colormap': 'gray', 'downsample': 0 },
+        ]
+        for config in fail_configs:
+            with self.subTest(config=config):
+                m = SpiralMatrix(5)
+                with self.assertRaises(AttributeError):
+                    m.render(io.BytesIO(), **config)
+
+    def test_06_pnm_extension(self):
+
+        pass_configs = [
+            { 'name': 'out.pgm', 'colormap': 'gray', 'want_magic': b'P5' },
+            { 'name': 'out.ppm', 'colormap': 'gray', 'want_magic': b'P6' },
+            { 'name': 'out.ppm', 'colormap': 'heat', 'want_magic': b'P6' },
+            { 'name': 'out.pnm', 'colormap': 'gray', 'want_magic': b'P5' },
+            { 'name': 'out.pnm', 'colormap': 'heat', 'want_magic': b'P6' },
+        ]
+        fail_configs = [
+            { 'name': 'heat.pgm', 'colormap': 'heat' },
+            { 'name': 'BLUE.PGM', 'colormap': lambda level: (0, 0, 0) },
+        ]
+        m = SpiralMatrix(5)
+        with tempfile.TemporaryDirectory() as directory:
+            for config in pass_configs:
+                with self.subTest(config=config):
+                    name, colormap, want_magic = config.values()
+                    path = os.path.join(directory, name)
+                    m.render(path, colormap=colormap)
+                    with open(path, 'rb') as stream:
+                        self.assertEqual(stream.read(2), want_magic)
+            for config in fail_configs:
+                with self.subTest(config=config):
+                    name, colormap = config.values()
+                    path = os.path.join(directory, name)
+                    with self.assertRaises(AttributeError):
+                        m.render(path, colormap=colormap)
+                    self.assertFalse(os.path.exists(path))
+
+################################################################################
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
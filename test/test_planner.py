@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# vim: set ff=unix fenc=utf-8 et ts=4 sts=4 sta sw=4:
+#
+# test_planner.py
+
+import unittest
+from spiral_matrix.planner import plan, describe
+from spiral_matrix.spiral_matrix import SpiralMatrix
+
+################################################################################
+class PlannerTestCase(unittest.TestCase):
+
+    def test_01_plan(self):
+
+        pass_configs = [
+            { 'dimension': 1, 'tokens': None, 'start': 1, 'budget': None,
+              'want_backend': 'compact' },
+            { 'dimension': 3001, 'tokens': None, 'start': 1, 'budget': None,
+              'want_backend': 'compact' },
+            { 'dimension': 3001, 'tokens': ['a', 'b'], 'start': 1,
+              'budget': None, 'want_backend': 'compact' },
+            { 'dimension': 1001, 'tokens': None, 'start': 2 ** 63,
+              'budget': None, 'want_backend': 'lazy' },
+            { 'dimension': 1001, 'tokens': None, 'start': 1,
+              'budget': 20 * 2 ** 20, 'want_backend': 'compact' },
+            { 'dimension': 1001, 'tokens': ['a', 'b'], 'start': 1,
+              'budget': 2 * 2 ** 20, 'want_backend': 'compact' },
+            { 'dimension': 1001, 'tokens': None, 'start': 2 ** 63,
+              'budget': 20 * 2 ** 20, 'want_backend': 'lazy' },
+            { 'dimension': 100001, 'tokens': None, 'start': 1,
+              'budget': None, 'want_backend': 'lazy' },
+        ]
+        for config in pass_configs:
+            with self.subTest(config=config):
+                dimension, tokens, start, budget, want_backend = \
+                        config.values()
+                p = plan(dimension, tokens, start, 1, budget)
+                self.assertEqual(p['backend'], want_backend)
+                self.assertEqual(set(p['estimates']),
+                        {'list', 'compact', 'lazy'})
+                self.assertIn(want_backend, describe(p))
+
+                # No fitting backend is estimated to be faster.
+                cost = lambda backend: p['estimates'][backend]['build'] + \
+                        p['estimates'][backend]['read']
+                for backend, estimate in p['estimates'].items():
+                    if estimate['fits']:
+                        self.assertLessEqual(cost(want_backend), cost(backend))
+
+    def test_02_dry_run(self):
+
+        m = SpiralMatrix(100001, words='a b c', dry_run=True)
+        self.assertEqual(m.backend, 'lazy')
+        self.assertFalse(hasattr(m, 'matrix'))
+        self.assertEqual(len(m.series), m.max)
+
+################################################################################
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# encoding: utf-8
+# vim: set ff=unix fenc=utf-8 et ts=4 sts=4 sta sw=4:
+#
+# test_sieve.py
+
+import io
+import random
+import tracemalloc
+import unittest
+from spiral_matrix.sieve import base_primes, small_primes, prime_flags
+from spiral_matrix.spiral_matrix import SpiralMatrix
+
+def is_prime(n):
+
+    return n > 1 and all(n % d for d in range(2, int(n ** 0.5) + 1))
+
+def is_large_prime(n):
+    '''
+    Test n for primality by Miller-Rabin, deterministic below 3 * 10**24.
+    '''
+
+    bases = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37]
+    if n < 2:
+        return False
+    if n in bases:
+        return True
+    if any(n % b == 0 for b in bases):
+        return False
+
+    d, r = n - 1, 0
+    while not d % 2:
+        d, r = d // 2, r + 1
+    for b in bases:
+        x = pow(b, d, n)
+        if x in (1, n - 1):
+            continue
+        for i in range(r - 1):
+            x = pow(x, 2, n)
+            if x == n - 1:
+                break
+        else:
+            return False
+
+    return True
+
+################################################################################
+class SieveTestCase(unittest.TestCase):
+
+    def test_01_small_primes(self):
+
+        pass_configs = [
+            { 'limit': 1, 'want_primes': [] },
+            { 'limit': 2, 'want_primes': [2] },
+            { 'limit': 30, 'want_primes': [2, 3, 5, 7, 11, 13, 17, 19, 23, 29] },
+        ]
+        for config in pass_configs:
+            with self.subTest(config=config):
+                limit, want_primes = config.values()
+                self.assertEqual(small_primes(limit), want_primes)
+
+        for limit in range(200):
+            for segment in [1, 3, 64]:
+                with self.subTest(limit=limit, segment=segment):
+                    self.assertEqual(list(base_primes(limit, segment)),
+                            small_primes(limit))
+
+    def test_02_prime_flags(self):
+
+        rng = random.Random(2018)
+        pass_configs = [
+            { 'start': 1, 'step': 1, 'count': 500, 'segment': 64 },
+            { 'start': 2, 'step': 2, 'count': 50, 'segment': 7 },
+            { 'start': 997, 'step': -1, 'count': 1200, 'segment': 100 },
+            { 'start': -100, 'step': 3, 'count': 300, 'segment': 1 },
+        ] + [
+            { 'start': rng.randint(-500, 5000),
+              'step': rng.choice([-1, 1]) * rng.randint(1, 60),
+              'count': rng.randint(1, 400),
+              'segment': rng.choice([1, 13, 256, 1 << 20]) }
+            for i in range(50)
+        ]
+        for config in pass_configs:
+            with self.subTest(config=config):
+                start, step, count, segment = config.values()
+                flags = b''.join(prime_flags(start, step, count, segment))
+                want = bytes(is_prime(start + i * step) for i in range(count))
+                self.assertEqual(flags, want)
+
+    def test_03_primes(self):
+
+        pass_configs = [
+            { 'dimension': 1, 'bearing': 'E', 'right': False, 'start': 2,
+              'step': 1 },
+            { 'dimension': 21, 'bearing': 'E', 'right': False, 'start': 1,
+              'step': 1 },
+            { 'dimension': 15, 'bearing': 'S', 'right': True, 'start': 41,
+              'step': 2 },
+            { 'dimension': 13, 'bearing': 'W', 'right': True, 'start': 300,
+              'step': -3 },
+        ]
+        for config in pass_configs:
+            with self.subTest(config=config):
+                m = SpiralMatrix(*config.values())
+                want = [[int(is_prime(cell)) for cell in row]
+                        for row in m.matrix]
+                self.assertEqual(m.primes(), want)
+                self.assertEqual(m.primes(segment=5), want)
+
+        m = SpiralMatrix(5, words='eenie meenie minie moe')
+        with self.assertRaises(AttributeError):
+            m.primes()
+
+        # A large start costs memory by the segment, not by its magnitude.
+        m = SpiralMatrix(11, start=10 ** 10 + 1, step=2, dry_run=True)
+        want = [[int(is_large_prime(m.series[index]))
+                for index in m._row_indices(i)] for i in range(11)]
+        tracemalloc.start()
+        try:
+            self.assertEqual(m.primes(segment=1 << 12), want)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertLess(peak, 1 << 16)
+
+        # The grid of flags must fit within the memory budget.
+        m = SpiralMatrix(1001, budget=2 ** 19, dry_run=True)
+        with self.assertRaises(AttributeError):
+            m.primes()
+        with self.assertRaises(AttributeError):
+            m.render(io.BytesIO(), primes=True)
+
+    def test_04_write_flags(self):
+
+        from spiral_matrix.exporters import text_layout, write_flags, \
+                write_rows
+
+        for axes in [False, True]:
+            with self.subTest(axes=axes):
+                mask = SpiralMatrix(9).primes()
+                want, got = io.StringIO(), io.StringIO()
+                write_rows((['.#'[flag] for flag in row] for row in mask),
+                        want, text_layout(9, 1, axes))
+                write_flags(mask, got, axes)
+                self.assertEqual(got.getvalue(), want.getvalue())
+
+################################################################################
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -4,9 +4,21 @@
 #
 # test_spiral_matrix.py
 
+import pickle
+import struct
 import unittest
 from spiral_matrix.spiral_matrix import SpiralMatrix
 
+class ReorderedMatrix(SpiralMatrix):
+    '''
+    Take the SpiralMatrix arguments in another order, by keyword only.
+    '''
+
+    def __init__(self, *, tokens=None, testing=False, dimension=None,
+            **kwargs):
+
+        super().__init__(dimension, tokens=tokens, testing=testing, **kwargs)
+
 ################################################################################
 class SpiralMatrixTestCase(unittest.TestCase):
 
@@ -52,6 +64,457 @@ class SpiralMatrixTestCase(unittest.TestCase):
                 m._build()
                 self.assertEqual(m.matrix, want_matrix)
 
+    def test_backends(self):
+
+        pass_configs = [
+            { 'dimension': 1, 'start': 5, 'step': 1, 'words': None },
+            { 'dimension': 7, 'start': 1, 'step': 1, 'words': None },
+            { 'dimension': 9, 'start': -40, 'step': -3, 'words': None },
+            { 'dimension': 7, 'start': 1, 'step': 1,
+              'words': 'eenie meenie minie moe' },
+        ]
+        for config in pass_configs:
+            for bearing in ['E', 'N', 'W', 'S']:
+                for right in [False, True]:
+                    with self.subTest(config=config, bearing=bearing,
+                            right=right):
+                        dimension, start, step, words = config.values()
+                        want = SpiralMatrix(dimension, bearing, right, start,
+                                step, words=words, backend='list')
+                        for backend in ['compact', 'lazy']:
+                            m = SpiralMatrix(dimension, bearing, right, start,
+                                    step, words=words, backend=backend)
+                            self.assertEqual(m.matrix, want.matrix)
+                            self.assertEqual(list(m.rows()), want.matrix)
+                            self.assertEqual(m.width, want.width)
+
+        fail_configs = ['array', '', 'LIST']
+        for config in fail_configs:
+            with self.subTest(config=config):
+                with self.assertRaises(AttributeError):
+                    SpiralMatrix(3, backend=config)
+
+        # Only a list matrix can be written; the others refuse, loudly.
+        for backend in ['compact', 'lazy']:
+            with self.subTest(backend=backend):
+                m = SpiralMatrix(3, backend=backend)
+                with self.assertRaises(TypeError):
+                    m.matrix[0][0] = 99
+                with self.assertRaises(TypeError):
+                    m.matrix[0].append(99)
+                self.assertEqual(m.matrix[0], [5, 4, 3])
+                self.assertEqual(pickle.loads(pickle.dumps(m.matrix[0])),
+                        [5, 4, 3])
+        m = SpiralMatrix(3, backend='list')
+        m.matrix[0][0] = 99
+        self.assertEqual(m.matrix[0], [99, 4, 3])
+
+    def test_pickle(self):
+
+        pass_configs = [
+            { 'backend': 'list', 'words': None },
+            { 'backend': 'list', 'words': 'eenie meenie minie moe' },
+            { 'backend': 'compact', 'words': None },
+            { 'backend': 'compact', 'words': 'eenie meenie minie moe' },
+            { 'backend': 'lazy', 'words': None },
+        ]
+        for config in pass_configs:
+            with self.subTest(config=config):
+                backend, words = config.values()
+                m = SpiralMatrix(101, 'S', True, 7, -3, words=words,
+                        backend=backend)
+                data = pickle.dumps(m)
+                self.assertLess(len(data), 1000)
+                copy = pickle.loads(data)
+                self.assertEqual(copy.backend, m.backend)
+                self.assertEqual(copy.matrix, m.matrix)
+
+                m.pickle_matrix = True
+                data = pickle.dumps(m)
+                if backend != 'lazy':
+                    self.assertGreater(len(data), m.max)
+                copy = pickle.loads(data)
+                self.assertTrue(copy.pickle_matrix)
+                self.assertEqual(copy.matrix, m.matrix)
+
+        # Copies are made from the parameters by name, not by position.
+        m = ReorderedMatrix(dimension=7, bearing='N', start=3, step=2,
+                words='eenie meenie minie moe', backend='compact')
+        copy = pickle.loads(pickle.dumps(m))
+        self.assertIsInstance(copy, ReorderedMatrix)
+        self.assertEqual(copy.matrix, m.matrix)
+        copy = m._unbuilt()
+        self.assertIsInstance(copy, ReorderedMatrix)
+        self.assertFalse(hasattr(copy, 'matrix'))
+        self.assertEqual(list(copy.rows()), m.matrix)
+
+    def test_accessors(self):
+
+        pass_configs = [
+            { 'dimension': 1, 'start': 5, 'step': 1, 'words': None },
+            { 'dimension': 9, 'start': -40, 'step': 3, 'words': None },
+            { 'dimension': 7, 'start': 1, 'step': 1,
+              'words': 'eenie meenie minie moe' },
+        ]
+        for config in pass_configs:
+            for bearing in ['E', 'N', 'W', 'S']:
+                for right in [False, True]:
+                    with self.subTest(config=config, bearing=bearing,
+                            right=right):
+                        dimension, start, step, words = config.values()
+                        want = SpiralMatrix(dimension, bearing, right, start,
+                                step, words=words).matrix
+                        m = SpiralMatrix(dimension, bearing, right, start,
+                                step, words=words, dry_run=True)
+                        last = dimension - 1
+                        for i in range(dimension):
+                            self.assertEqual(m.row(i), want[i])
+                            self.assertEqual(m.column(i),
+                                    [row[i] for row in want])
+                        self.assertEqual(m.diagonal(),
+                                [want[i][i] for i in range(dimension)])
+                        self.assertEqual(m.anti_diagonal(),
+                                [want[i][last - i] for i in range(dimension)])
+
+        m = SpiralMatrix(7, start=10, step=5, backend='lazy')
+        for k in range(4):
+            with self.subTest(k=k):
+                want = [cell for y, row in enumerate(m.matrix)
+                        for x, cell in enumerate(row)
+                        if max(abs(y - 3), abs(x - 3)) == k]
+                self.assertEqual(m.ring(k), sorted(want))
+
+        fail_configs = [-1, 7, 'foo', None]
+        for config in fail_configs:
+            with self.subTest(config=config):
+                with self.assertRaises(AttributeError):
+                    m.row(config)
+                with self.assertRaises(AttributeError):
+                    m.column(config)
+                with self.assertRaises(AttributeError):
+                    m.ring(config if config != 7 else 4)
+
+    def test_aggregate(self):
+
+        pass_configs = [
+            { 'dimension': 1, 'bearing': 'E', 'right': False, 'start': 5,
+              'step': 1 },
+            { 'dimension': 9, 'bearing': 'N', 'right': True, 'start': -40,
+              'step': 3 },
+            { 'dimension': 11, 'bearing': 'W', 'right': False, 'start': 100,
+              'step': -7 },
+        ]
+        for config in pass_configs:
+            m = SpiralMatrix(*config.values())
+            dimension, h, matrix = m.dimension, m.dimension // 2, m.matrix
+            lines = {
+                ('matrix', None): [cell for row in matrix for cell in row],
+                ('diagonal', None):
+                    [matrix[i][i] for i in range(dimension)],
+                ('anti_diagonal', None):
+                    [matrix[i][dimension - 1 - i] for i in range(dimension)],
+            }
+            for i in range(dimension):
+                lines[('row', i)] = matrix[i]
+                lines[('column', i)] = [row[i] for row in matrix]
+            for k in range(h + 1):
+                lines[('ring', k)] = [cell for y, row in enumerate(matrix)
+                        for x, cell in enumerate(row)
+                        if max(abs(y - h), abs(x - h)) == k]
+            for (line, i), cells in lines.items():
+                with self.subTest(config=config, line=line, i=i):
+                    self.assertEqual(m.aggregate(line, i), {
+                        'count': len(cells), 'sum': sum(cells),
+                        'min': min(cells), 'max': max(cells) })
+
+        fail_configs = [
+            { 'words': None, 'line': 'rows' },
+            { 'words': None, 'line': 'row' },
+            { 'words': 'eenie meenie', 'line': 'matrix' },
+        ]
+        for config in fail_configs:
+            with self.subTest(config=config):
+                words, line = config.values()
+                m = SpiralMatrix(5, words=words)
+                with self.assertRaises(AttributeError):
+                    m.aggregate(line)
+
+    def test_tokens(self):
+
+        def counted(tokens, taken):
+            for token in tokens:
+                taken.append(token)
+                yield token
+
+        pass_configs = [
+            { 'dimension': 3, 'tokens': ['eenie', 'meenie', 'minie', 'moe'],
+              'want_taken': 4 },
+            { 'dimension': 3, 'tokens': [f'w{i}' for i in range(100)],
+              'want_taken': 9 },
+            { 'dimension': 1, 'tokens': ['eenie', 'meenie'],
+              'want_taken': 1 },
+        ]
+        for config in pass_configs:
+            with self.subTest(config=config):
+                dimension, tokens, want_taken = config.values()
+                want = SpiralMatrix(dimension, words=' '.join(tokens))
+                taken = []
+                m = SpiralMatrix(dimension, tokens=counted(tokens, taken))
+                self.assertEqual(len(taken), want_taken)
+                self.assertEqual(m.matrix, want.matrix)
+                self.assertEqual(len(m.tokens), want_taken)
+
+        m = SpiralMatrix(3, tokens=iter([(1, 'a'), 'b c', 3.5]))
+        self.assertEqual(m.matrix[1], [3.5, (1, 'a'), 'b c'])
+        self.assertEqual(pickle.loads(pickle.dumps(m)).matrix, m.matrix)
+
+        # Each distinct token is held once; the cycle is held as ids.
+        for backend in SpiralMatrix.builders:
+            with self.subTest(backend=backend):
+                m = SpiralMatrix(101, tokens=(str(i % 2) for i in range(10 ** 5)),
+                        backend=backend)
+                self.assertEqual(m.tokens, ['0', '1'])
+                self.assertEqual(len(m.token_ids), m.max)
+                self.assertEqual(m.token_ids.typecode, 'B')
+                self.assertEqual(m.buffer().format, 'B')
+                self.assertEqual(m.matrix[0][:3], ['0', '1', '0'])
+                copy = pickle.loads(pickle.dumps(m))
+                self.assertEqual(copy.tokens, m.tokens)
+                self.assertEqual(copy.token_ids, m.token_ids)
+
+        m = SpiralMatrix(5, tokens=[['a'], ['b'], ['a']])
+        self.assertEqual(m.tokens, [['a'], ['b']])
+        self.assertEqual(list(m.token_ids), [0, 1, 0])
+        self.assertEqual(SpiralMatrix(21, tokens=range(300)).token_ids.typecode,
+                'H')
+
+        fail_configs = [[], iter(()), 5]
+        for config in fail_configs:
+            with self.subTest(config=config):
+                with self.assertRaises(AttributeError):
+                    SpiralMatrix(3, tokens=config)
+
+        # An error raised while the iterable is read is passed on as it is.
+        def broken():
+            yield 'eenie'
+            raise TypeError('cursor closed')
+
+        with self.assertRaisesRegex(TypeError, 'cursor closed'):
+            SpiralMatrix(3, tokens=broken())
+
+    def test_find(self):
+
+        pass_configs = [
+            { 'dimension': 7, 'start': 1, 'step': 1,
+              'words': 'eenie meenie minie eenie moe',
+              'elements': ['eenie', 'moe', 'tiger', 5] },
+            { 'dimension': 9, 'start': 100, 'step': -3,
+              'words': None,
+              'elements': [100, 97, 98, 100 - 80 * 3, 100 - 81 * 3, 'moe'] },
+            { 'dimension': 3, 'start': 1, 'step': 1,
+              'words': ' '.join(f'w{i}' for i in range(20)),
+              'elements': ['w0', 'w8', 'w9'] },
+        ]
+        for config in pass_configs:
+            for bearing in ['E', 'S']:
+                for right in [False, True]:
+                    dimension, start, step, words, elements = config.values()
+                    m = SpiralMatrix(dimension, bearing, right, start, step,
+                            words=words)
+                    for element in elements:
+                        with self.subTest(config=config, bearing=bearing,
+                                right=right, element=element):
+                            want = [(y, x) for y, row in enumerate(m.matrix)
+                                    for x, cell in enumerate(row)
+                                    if cell == element]
+                            self.assertEqual(sorted(m.find(element)), want)
+
+        m = SpiralMatrix(3, tokens=[['a'], ['b']])
+        self.assertEqual(list(m.find(['b'])), [(1, 2), (0, 1), (1, 0), (2, 1)])
+
+        # Hashable tokens are looked up through one map, made on first use;
+        # unhashable ones by equality.
+        m = SpiralMatrix(3, tokens=['a', ['b'], 'c', 'a'])
+        self.assertIsNone(m._token_index)
+        self.assertEqual(list(m.find('c')), [m._coords(2), m._coords(6)])
+        self.assertEqual(m._token_index, { 'a': 0, 'c': 2 })
+        index = m._token_index
+        self.assertEqual(list(m.find(['b'])), [m._coords(1), m._coords(5)])
+        self.assertEqual(list(m.find('a'))[:2], [m._coords(0), m._coords(3)])
+        self.assertIs(m._token_index, index)
+
+        # A miss costs nothing, however large the grid.
+        m = SpiralMatrix(20001, words='a b c', dry_run=True)
+        self.assertEqual(list(m.find('zz')), [])
+        self.assertEqual(list(m.find(['a'])), [])
+        self.assertEqual(next(m.find('c')), m._coords(2))
+
+    def test_buffer(self):
+
+        pass_configs = [
+            { 'start': 1, 'step': 1, 'words': None, 'want_typestr': '<i8' },
+            { 'start': -2 ** 40, 'step': 2 ** 33, 'words': None,
+              'want_typestr': '<i8' },
+            { 'start': 1, 'step': 1, 'words': 'eenie meenie minie moe',
+              'want_typestr': '|u1' },
+        ]
+        for config in pass_configs:
+            for backend in SpiralMatrix.builders:
+                with self.subTest(config=config, backend=backend):
+                    start, step, words, want_typestr = config.values()
+                    m = SpiralMatrix(7, 'S', True, start, step, words=words,
+                            backend=backend)
+                    view = m.buffer()
+                    self.assertTrue(view.readonly)
+                    self.assertEqual(view.shape, (7, 7))
+                    cells = view.tolist()
+                    if words:
+                        cells = [[m.tokens[id] for id in row] for row in cells]
+                    self.assertEqual(cells, [list(row) for row in m.matrix])
+                    interface = m.__array_interface__
+                    self.assertEqual(interface['shape'], (7, 7))
+                    self.assertEqual(interface['typestr'], want_typestr)
+
+        # The compact array is shared, not copied.
+        m = SpiralMatrix(5, backend='compact')
+        self.assertEqual(struct.unpack_from('5q', m.buffer(), 8 * 5),
+                tuple(m.matrix.values[5:10]))
+        with self.assertRaises(TypeError):
+            m.buffer()[0, 0] = 0
+        self.assertIs(m.buffer().obj, m.matrix.values)
+
+        # The default backend shares its cells, as does a frozen list.
+        m = SpiralMatrix(5)
+        self.assertIs(m.buffer().obj, m.matrix.values)
+        m = SpiralMatrix(5, backend='list').freeze()
+        self.assertIs(m.buffer().obj, m.buffer().obj)
+
+        with self.assertRaises(AttributeError):
+            SpiralMatrix(3, start=2 ** 70, backend='lazy').buffer()
+
+    def test_freeze(self):
+
+        for backend in SpiralMatrix.builders:
+            with self.subTest(backend=backend):
+                m = SpiralMatrix(5, words='a bb ccc', backend=backend)
+                want = [list(row) for row in m.matrix]
+                self.assertIs(m.freeze(), m)
+                self.assertTrue(m.frozen)
+                self.assertNotEqual(m.backend, 'list')
+                self.assertEqual(m.matrix, want)
+                self.assertEqual(m._cell_width, 3)
+                self.assertEqual(list(m.find('a')), list(m.find('a')))
+                for name in ['start', 'matrix', 'pickle_matrix', 'new']:
+                    with self.assertRaises(AttributeError):
+                        setattr(m, name, None)
+
+                # Neither the cells nor the tokens can be changed in place.
+                with self.assertRaises(TypeError):
+                    m.tokens[0] = 'Q'
+                with self.assertRaises(TypeError):
+                    m.token_ids[0] = 1
+                if backend != 'lazy':
+                    with self.assertRaises(TypeError):
+                        m.matrix.values[4] = 2
+                self.assertEqual(m.matrix, want)
+                self.assertEqual(m.buffer().tolist(),
+                        [[m.tokens.index(cell) for cell in row]
+                            for row in want])
+
+                for pickle_matrix in [False, True]:
+                    copy = SpiralMatrix(5, words='a bb ccc', backend=backend)
+                    copy.pickle_matrix = pickle_matrix
+                    copy = pickle.loads(pickle.dumps(copy.freeze()))
+                    self.assertTrue(copy.frozen)
+                    self.assertEqual(copy.matrix, want)
+                    with self.assertRaises(TypeError):
+                        copy.tokens[0] = 'Q'
+
+        m = SpiralMatrix(5, backend='compact').freeze()
+        with self.assertRaises(TypeError):
+            m.matrix.values[4] = 999
+        self.assertIs(m.buffer().obj, m.matrix.values.obj)
+
+        # A list matrix is frozen with its cells as they stand, edits too.
+        m = SpiralMatrix(3, backend='list')
+        m.matrix[0][0] = 99
+        m.matrix[2][2] = -2 ** 63
+        m.freeze()
+        self.assertEqual(m.matrix[0], [99, 4, 3])
+        self.assertEqual(m.buffer().tolist()[2], [7, 8, -2 ** 63])
+        m = SpiralMatrix(3, words='a bb ccc', backend='list')
+        m.matrix[1][1] = 'ccc'
+        want = [list(row) for row in m.matrix]
+        self.assertEqual(m.freeze().matrix, want)
+        self.assertEqual(m.matrix[1][1], 'ccc')
+
+        fail_configs = [
+            { 'words': None, 'cell': 2 ** 63 },
+            { 'words': None, 'cell': 'x' },
+            { 'words': 'a bb ccc', 'cell': 'dddd' },
+            { 'words': 'a bb ccc', 'cell': ['a'] },
+        ]
+        for config in fail_configs:
+            with self.subTest(config=config):
+                words, cell = config.values()
+                m = SpiralMatrix(3, words=words, backend='list')
+                m.matrix[0][0] = cell
+                with self.assertRaises(AttributeError):
+                    m.freeze()
+                self.assertFalse(m.frozen)
+                self.assertEqual(m.backend, 'list')
+
+        self.assertFalse(SpiralMatrix(3).frozen)
+
+    def test_batch(self):
+
+        pass_configs = [
+            { 'dimension': 9, 'starts': [1, -50, 7], 'steps': [1, 3, -2] },
+            { 'dimension': 5, 'starts': range(10), 'steps': -7 },
+            { 'dimension': 7, 'starts': 100, 'steps': [1, 2, 3, 4] },
+            { 'dimension': 3, 'starts': [2 ** 63 - 1, -2 ** 63],
+              'steps': [-2 ** 60, 2 ** 60] },
+            { 'dimension': 1, 'starts': [0], 'steps': [5] },
+        ]
+        for config in pass_configs:
+            for bearing in ['E', 'N', 'W', 'S']:
+                for right in [False, True]:
+                    with self.subTest(config=config, bearing=bearing,
+                            right=right):
+                        dimension, starts, steps = config.values()
+                        b = SpiralMatrix.batch(dimension, bearing, right,
+                                starts, steps)
+                        count = max(len(values) for values in (starts, steps)
+                                if not isinstance(values, int))
+                        self.assertEqual(len(b), count)
+                        view = b.buffer()
+                        self.assertEqual(view.shape,
+                                (count, dimension, dimension))
+                        cells = view.tolist()
+                        for k in range(count):
+                            start = starts if isinstance(starts, int) \
+                                    else starts[k]
+                            step = steps if isinstance(steps, int) \
+                                    else steps[k]
+                            m = SpiralMatrix(dimension, bearing, right,
+                                    start, step, backend='list')
+                            self.assertEqual(b[k], m.matrix)
+                            self.assertEqual(cells[k], m.matrix)
+                            self.assertEqual(b.widths[k], m.width)
+
+        fail_configs = [
+            { 'starts': [], 'steps': 1 },
+            { 'starts': [1, 2], 'steps': [1, 2, 3] },
+            { 'starts': 1, 'steps': [1, 0] },
+            { 'starts': ['one'], 'steps': 1 },
+            { 'starts': [1, 2 ** 63 - 5], 'steps': 1 },
+        ]
+        for config in fail_configs:
+            with self.subTest(config=config):
+                starts, steps = config.values()
+                with self.assertRaises(AttributeError):
+                    SpiralMatrix.batch(3, starts=starts, steps=steps)
+
 ################################################################################
 class SpiralMatrixMethodsTestCase(unittest.TestCase):
 
@@ -158,7 +621,7 @@ class SpiralMatrixMethodsTestCase(unittest.TestCase):
         for config in pass_configs:
             with self.subTest(config=config):
                 series, index, want_coords = config.values()
-                m = SpiralMatrix(5)
+                m = SpiralMatrix(5, backend='list')
                 m.series = (list(series) * 5)[:m.max]
                 new_index = m._fill(want_coords, index)
                 self.assertIsInstance(new_index, int)